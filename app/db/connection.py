@@ -1,15 +1,32 @@
 import logging
-from typing import Any, Dict, List
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, \
+    Set, Tuple, Type
 
 import asyncio
-import asyncpg
-import aiomysql
+
+from app.db.metrics import QueryMetrics
+
+if TYPE_CHECKING:
+    import asyncpg
+    import aiomysql
 
 logger = logging.getLogger(__name__)
 
 
 class BaseDBConnection:
-    """Base class for database connections."""
+    """
+    Base class for database connections.
+
+    Attributes:
+        statements (dict): Registered named statements, mapping a name to
+            its query text and optional timeout.
+        metrics (QueryMetrics): Prepare/execute timings per statement.
+    """
+
+    def __init__(self):
+        self.statements: Dict[str, Tuple[str, Optional[float]]] = {}
+        self.metrics = QueryMetrics()
 
     async def connect(self):
         """
@@ -33,6 +50,68 @@ class BaseDBConnection:
         """
         raise NotImplementedError
 
+    async def warm_up(self, size: int = None) -> None:
+        """
+        Open pooled connections ahead of the run.
+
+        :param size: Number of connections to open.
+        """
+        raise NotImplementedError
+
+    async def listen(self,
+                     channel: str,
+                     callback: Callable[[str], None],
+                     on_lost: Callable[[Exception], None] = None) -> None:
+        """
+        Subscribe to notifications on a channel.
+
+        :param channel: Notification channel name.
+        :param callback: Called with the payload of every notification.
+        :param on_lost: Called with the error if the subscription is lost
+            and cannot be restored.
+        """
+        raise NotImplementedError
+
+    async def unlisten(self, channel: str) -> None:
+        """
+        Unsubscribe from a channel subscribed to with listen.
+
+        :param channel: Notification channel name.
+        """
+        raise NotImplementedError
+
+    def prepare_statement(self,
+                          name: str,
+                          query: str,
+                          timeout: float = None) -> None:
+        """
+        Register a named statement.
+
+        Engines that support server-side prepared statements prepare it once
+        per pooled connection and reuse it for every execution.
+
+        :param name: Name used to execute the statement.
+        :param query: SQL query string.
+        :param timeout: Per-query timeout in seconds, overriding the
+            connection default.
+        """
+        self.statements[name] = (query, timeout)
+
+    async def execute_prepared(self, name: str, *params: Any) -> List[Any]:
+        """
+        Execute a named statement registered with prepare_statement.
+
+        :param name: Name of the statement.
+        :param params: Parameters for the query.
+        :return: Result of the query execution.
+        """
+        query, timeout = self.statements[name]
+        start = time.perf_counter()
+        result = await asyncio.wait_for(self.execute_query(query, *params),
+                                        timeout)
+        self.metrics.record_execute(name, time.perf_counter() - start)
+        return result
+
 
 class PostgresDBConnection(BaseDBConnection):
     """
@@ -46,17 +125,26 @@ class PostgresDBConnection(BaseDBConnection):
         pool (asyncpg.Pool): Connection pool object.
         pool_min_size (int): Minimum size of the connection pool.
         pool_max_size (int): Maximum size of the connection pool.
+        pool_warm_size (int): Number of connections opened by warm_up.
+        statement_cache_size (int): Size of asyncpg's per-connection
+            statement cache.
+        query_timeout (float): Default per-query timeout in seconds.
 
     Methods:
         connect(retries=3, delay=2): Establish a connection to PostgreSQL.
         disconnect(): Close the connection pool.
         execute_query(query, *params): Execute a query on PostgreSQL.
+        execute_prepared(name, *params): Execute a named prepared statement.
+        warm_up(size=None): Open and prime pooled connections.
+        listen(channel, callback, on_lost=None): LISTEN on a channel.
+        unlisten(channel): Stop listening on a channel.
     """
 
     def __init__(self,
                  config: Dict[str, Any],
                  pool_min_size=1,
                  pool_max_size=10):
+        super().__init__()
         self.config = config
         self.config["dsn"] = (
             f"postgresql://{self.config['user']}:{self.config['password']}"
@@ -66,8 +154,19 @@ class PostgresDBConnection(BaseDBConnection):
         self.pool = None
         self.pool_min_size = pool_min_size
         self.pool_max_size = pool_max_size
-
-    async def connect(self, retries=3, delay=2) -> asyncpg.Pool:
+        self.pool_warm_size = config.get("pool_warm_size", pool_min_size)
+        self.statement_cache_size = config.get("statement_cache_size", 100)
+        self.query_timeout = config.get("query_timeout")
+        # Names of the statements in the statement cache of each pooled
+        # connection, keyed by backend pid.
+        self._prepared: Dict[int, Set[str]] = {}
+        # Connection held for LISTEN, the listener and on_lost callback of
+        # each channel, and the task restoring them after a disconnect.
+        self._listen_conn = None
+        self._listeners: Dict[str, Tuple[Callable, Callable]] = {}
+        self._relisten_task = None
+
+    async def connect(self, retries=3, delay=2) -> "asyncpg.Pool":
         """
         Establish a connection to the PostgreSQL database.
 
@@ -75,12 +174,17 @@ class PostgresDBConnection(BaseDBConnection):
         :param delay: Delay between retry attempts in seconds.
         :return: Connection pool object.
         """
+        import asyncpg  # pylint: disable=import-outside-toplevel
+
         for attempt in range(retries):
             try:
                 self.pool = await asyncpg.create_pool(
                     dsn=self.config["dsn"],
                     min_size=self.pool_min_size,
                     max_size=self.pool_max_size,
+                    statement_cache_size=self.statement_cache_size,
+                    command_timeout=self.query_timeout,
+                    init=self._init_connection,
                 )
                 logger.info("Postgres connection pool created")
                 return self.pool
@@ -118,7 +222,166 @@ class PostgresDBConnection(BaseDBConnection):
         :return: Result of the query execution.
         """
         async with self.pool.acquire() as conn:
-            return await conn.fetch(query, *params)
+            return await conn.fetch(query, *params,
+                                    timeout=self.query_timeout)
+
+    async def execute_prepared(self, name: str, *params: Any) -> List[Any]:
+        """
+        Execute a named prepared statement on the PostgreSQL database.
+
+        The statement is kept in asyncpg's per-connection statement cache,
+        so it is prepared once per pooled connection and later executions
+        skip the parse/plan round trip. PreparedStatement objects are not
+        kept: asyncpg invalidates them when their connection is released
+        back to the pool.
+
+        :param name: Name of the statement.
+        :param params: Parameters for the query.
+        :return: Result of the query execution.
+        """
+        query, timeout = self.statements[name]
+        async with self.pool.acquire() as conn:
+            await self._prime_statement(conn, name)
+            start = time.perf_counter()
+            result = await conn.fetch(
+                query, *params, timeout=timeout or self.query_timeout)
+            self.metrics.record_execute(name, time.perf_counter() - start)
+            return result
+
+    async def warm_up(self, size: int = None) -> None:
+        """
+        Open ``size`` pooled connections and prepare every registered
+        statement on each of them, so the first chunks of the run do not
+        pay connection setup or prepare costs.
+
+        :param size: Number of connections, defaults to pool_warm_size.
+        """
+        size = min(size or self.pool_warm_size, self.pool_max_size)
+        connections = await asyncio.gather(
+            *(self.pool.acquire() for _ in range(size)))
+        try:
+            for conn in connections:
+                for name in self.statements:
+                    await self._prime_statement(conn, name)
+        finally:
+            for conn in connections:
+                await self.pool.release(conn)
+        logger.info("Postgres pool warmed up with %d connections", size)
+
+    async def listen(self,
+                     channel: str,
+                     callback: Callable[[str], None],
+                     on_lost: Callable[[Exception], None] = None) -> None:
+        """
+        LISTEN on a channel. One pooled connection is held for all
+        channels until the last one is unlistened.
+
+        If that connection is terminated, a new one is acquired and every
+        channel is listened on again; notifications sent in between are
+        missed. If no connection can be acquired, on_lost is called.
+
+        :param channel: Notification channel name.
+        :param callback: Called with the payload of every notification.
+        :param on_lost: Called with the error if the subscription is lost
+            and cannot be restored.
+        """
+        if self._listen_conn is None:
+            self._listen_conn = await self._acquire_listen_conn()
+
+        def listener(_conn, _pid, _channel, payload):
+            callback(payload)
+
+        self._listeners[channel] = (listener, on_lost)
+        await self._listen_conn.add_listener(channel, listener)
+        logger.info("Listening on Postgres channel %s", channel)
+
+    async def unlisten(self, channel: str) -> None:
+        """
+        Stop listening on a channel, releasing the held connection after
+        the last one.
+
+        :param channel: Notification channel name.
+        """
+        listener, _ = self._listeners.pop(channel, (None, None))
+        if listener is None or self._listen_conn is None:
+            return
+        await self._listen_conn.remove_listener(channel, listener)
+        if not self._listeners:
+            await self._release_listen_conn(self._listen_conn)
+            self._listen_conn = None
+
+    async def _acquire_listen_conn(self):
+        conn = await self.pool.acquire()
+        conn.add_termination_listener(self._on_listen_terminated)
+        return conn
+
+    async def _release_listen_conn(self, conn) -> None:
+        # asyncpg keeps termination listeners across a release and calls
+        # them on a graceful close too.
+        conn.remove_termination_listener(self._on_listen_terminated)
+        await self.pool.release(conn)
+
+    def _on_listen_terminated(self, conn) -> None:
+        if not self._listeners:
+            return
+        logger.error("LISTEN connection lost; notifications are missed "
+                     "until it is re-established.")
+        self._relisten_task = asyncio.create_task(self._relisten(conn))
+
+    async def _relisten(self, lost_conn, retries=3, delay=2) -> None:
+        import asyncpg  # pylint: disable=import-outside-toplevel
+
+        self._listen_conn = None
+        await self._release_listen_conn(lost_conn)
+        error = None
+        for attempt in range(retries):
+            if not self._listeners:
+                return
+            conn = None
+            try:
+                conn = await self._acquire_listen_conn()
+                for channel, (listener, _) in list(
+                        self._listeners.items()):
+                    await conn.add_listener(channel, listener)
+                if not self._listeners:
+                    # Every channel was unlistened in the meantime.
+                    await self._release_listen_conn(conn)
+                    return
+                self._listen_conn = conn
+                logger.info("Listening again on Postgres channels %s",
+                            ", ".join(self._listeners))
+                return
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError,
+                    asyncpg.InterfaceError) as e:
+                error = e
+                logger.error("LISTEN reconnect attempt %s failed: %s",
+                             attempt + 1, e)
+                if conn is not None:
+                    await self._release_listen_conn(conn)
+                if attempt < retries - 1:
+                    await asyncio.sleep(delay)
+                    delay *= 2
+
+        for _, on_lost in self._listeners.values():
+            if on_lost:
+                on_lost(error)
+
+    async def _init_connection(self, conn) -> None:
+        # A new backend may reuse the pid of a closed one.
+        self._prepared.pop(conn.get_server_pid(), None)
+
+    async def _prime_statement(self, conn, name: str) -> None:
+        prepared = self._prepared.setdefault(conn.get_server_pid(), set())
+        if name in prepared:
+            return
+        query, _ = self.statements[name]
+        start = time.perf_counter()
+        # Connection.prepare bypasses the statement cache that fetch
+        # looks statements up in; _prepare with use_cache fills it.
+        # pylint: disable=protected-access
+        await conn._prepare(query, use_cache=True)
+        self.metrics.record_prepare(name, time.perf_counter() - start)
+        prepared.add(name)
 
 
 class MySQLDBConnection(BaseDBConnection):
@@ -133,23 +396,29 @@ class MySQLDBConnection(BaseDBConnection):
         pool (aiomysql.Pool): Connection pool object.
         pool_min_size (int): Minimum size of the connection pool.
         pool_max_size (int): Maximum size of the connection pool.
+        pool_warm_size (int): Number of connections opened by warm_up.
+        query_timeout (float): Default per-query timeout in seconds.
 
     Methods:
         connect(retries=3, delay=2): Establish a connection to MySQL.
         disconnect(): Close the connection pool.
         execute_query(query, *params): Execute a query on MySQL.
+        warm_up(size=None): Open pooled connections.
     """
 
     def __init__(self,
                  config: Dict[str, Any],
                  pool_min_size=1,
                  pool_max_size=10):
+        super().__init__()
         self.config = config
         self.pool = None
         self.pool_min_size = pool_min_size
         self.pool_max_size = pool_max_size
+        self.pool_warm_size = config.get("pool_warm_size", pool_min_size)
+        self.query_timeout = config.get("query_timeout")
 
-    async def connect(self, retries=3, delay=2) -> aiomysql.Pool:
+    async def connect(self, retries=3, delay=2) -> "aiomysql.Pool":
         """
         Establish a connection to the MySQL database.
 
@@ -157,6 +426,8 @@ class MySQLDBConnection(BaseDBConnection):
         :param delay: Delay between retry attempts in seconds.
         :return: Connection pool object.
         """
+        import aiomysql  # pylint: disable=import-outside-toplevel
+
         for attempt in range(retries):
             try:
                 self.pool = await aiomysql.create_pool(
@@ -205,10 +476,44 @@ class MySQLDBConnection(BaseDBConnection):
         """
         async with self.pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute(query, params)
+                await asyncio.wait_for(cursor.execute(query, params),
+                                       self.query_timeout)
                 result = await cursor.fetchall()
                 return result
 
+    async def warm_up(self, size: int = None) -> None:
+        """
+        Open ``size`` pooled connections ahead of the run.
+
+        :param size: Number of connections, defaults to pool_warm_size.
+        """
+        size = min(size or self.pool_warm_size, self.pool_max_size)
+        connections = await asyncio.gather(
+            *(self.pool.acquire() for _ in range(size)))
+        for conn in connections:
+            self.pool.release(conn)
+        logger.info("MySQL pool warmed up with %d connections", size)
+
+
+# Registry of supported DB engines. Driver modules (asyncpg, aiomysql) are
+# only imported when a connection class actually connects, so a run never
+# pays the import cost of an engine it does not use.
+DB_ENGINES: Dict[str, Type[BaseDBConnection]] = {
+    "postgres": PostgresDBConnection,
+    "mysql": MySQLDBConnection,
+}
+
+
+def register_db_engine(engine: str,
+                       connection_class: Type[BaseDBConnection]) -> None:
+    """
+    Register a DB connection class for an engine name.
+
+    :param engine: Engine name as used in the ``engine`` config key.
+    :param connection_class: BaseDBConnection subclass for the engine.
+    """
+    DB_ENGINES[engine.lower()] = connection_class
+
 
 def get_db_connection(config: Dict[str, Any]) -> BaseDBConnection:
     """
@@ -220,10 +525,8 @@ def get_db_connection(config: Dict[str, Any]) -> BaseDBConnection:
     """
     engine = config.get("engine", "postgres").lower()
 
-    if engine == "postgres":
-        return PostgresDBConnection(config)
-
-    if engine == "mysql":
-        return MySQLDBConnection(config)
+    connection_class = DB_ENGINES.get(engine)
+    if connection_class is None:
+        raise ValueError(f"Unsupported DB engine: {engine}")
 
-    raise ValueError(f"Unsupported DB engine: {engine}")
+    return connection_class(config)
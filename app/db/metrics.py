@@ -0,0 +1,74 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass
+class StatementMetrics:
+    """
+    Timing counters for a single named prepared statement.
+
+    Attributes:
+        prepares (int): Number of times the statement was prepared.
+        prepare_seconds (float): Total time spent preparing it.
+        executions (int): Number of times the statement was executed.
+        execute_seconds (float): Total time spent executing it.
+    """
+
+    prepares: int = 0
+    prepare_seconds: float = 0.0
+    executions: int = 0
+    execute_seconds: float = 0.0
+
+    @property
+    def saved_seconds_per_execution(self) -> float:
+        """
+        Estimated parse/plan latency saved per execution.
+
+        Every execution that reused a cached statement skipped one prepare
+        round trip, so the saving is the average prepare cost spread over
+        all executions.
+        """
+        if not self.executions or not self.prepares:
+            return 0.0
+        reused = max(self.executions - self.prepares, 0)
+        average_prepare = self.prepare_seconds / self.prepares
+        return average_prepare * reused / self.executions
+
+
+class QueryMetrics:
+    """Collects per-statement prepare and execute timings."""
+
+    def __init__(self):
+        self.statements: Dict[str, StatementMetrics] = defaultdict(
+            StatementMetrics)
+
+    def record_prepare(self, name: str, seconds: float) -> None:
+        metrics = self.statements[name]
+        metrics.prepares += 1
+        metrics.prepare_seconds += seconds
+
+    def record_execute(self, name: str, seconds: float) -> None:
+        metrics = self.statements[name]
+        metrics.executions += 1
+        metrics.execute_seconds += seconds
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarise the collected timings per statement.
+
+        :return: Mapping of statement name to its counters, with latencies
+            in milliseconds.
+        """
+        return {
+            name: {
+                "prepares": metrics.prepares,
+                "executions": metrics.executions,
+                "avg_execute_ms": round(
+                    metrics.execute_seconds * 1000
+                    / max(metrics.executions, 1), 3),
+                "saved_ms_per_execution": round(
+                    metrics.saved_seconds_per_execution * 1000, 3),
+            }
+            for name, metrics in self.statements.items()
+        }
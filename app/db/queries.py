@@ -9,3 +9,78 @@ GET_FACILITIES_QUERY = """
     ORDER BY id
     OFFSET $1 LIMIT $2;
 """
+
+# SQL query that probes the facility table for changes. The checksum sums
+# a hash of every row's text, so it also changes when an existing row is
+# updated; it costs one sequential scan but transfers a single row.
+GET_FACILITIES_PROBE_QUERY = """
+    SELECT COUNT(*) AS row_count,
+           MAX(f.id) AS max_id,
+           COALESCE(SUM(hashtext(f::text)), 0) AS checksum
+    FROM facility f;
+"""
+
+# Name under which GET_FACILITIES_QUERY is registered as a prepared statement.
+GET_FACILITIES_STATEMENT = "get_facilities"
+
+# SQL query that builds each facility's feed record in the database, in
+# the layout FacilityFeedGenerator writes (keys in transform_record order,
+# ", " and ": " separators), so each row carries the record's serialised
+# JSON text and needs no Python-side transform. to_json() escapes strings
+# and prints floats with the shortest round-trip digits. The text is
+# concatenated by hand because json_build_object separates keys and
+# values with " : ", which makes gzip level 9 roughly twice as slow.
+# Paginated like GET_FACILITIES_QUERY.
+GET_FACILITIES_JSON_QUERY = """
+    SELECT '{"entity_id": ' || to_json(id)::text
+        || ', "name": ' || COALESCE(to_json(name)::text, 'null')
+        || ', "telephone": ' || COALESCE(to_json(phone)::text, 'null')
+        || ', "url": ' || COALESCE(to_json(url)::text, 'null')
+        || ', "location": {"latitude": '
+        || COALESCE(to_json(latitude)::text, 'null')
+        || ', "longitude": ' || COALESCE(to_json(longitude)::text, 'null')
+        || ', "address": {"country": '
+        || COALESCE(to_json(country)::text, 'null')
+        || ', "locality": ' || COALESCE(to_json(locality)::text, 'null')
+        || ', "region": ' || COALESCE(to_json(region)::text, 'null')
+        || ', "postal_code": ' || COALESCE(to_json(postal_code)::text, 'null')
+        || ', "street_address": '
+        || COALESCE(to_json(street_address)::text, 'null')
+        || '}}}' AS record
+    FROM facility
+    ORDER BY id
+    OFFSET $1 LIMIT $2;
+"""
+
+# Name under which GET_FACILITIES_JSON_QUERY is registered as a prepared
+# statement.
+GET_FACILITIES_JSON_STATEMENT = "get_facilities_json"
+
+# SQL query to retrieve facility details for one shard: ids whose
+# remainder modulo the shard count $3 is the shard index $4, paginated with
+# OFFSET $1 and LIMIT $2 like GET_FACILITIES_QUERY. Every id belongs to
+# exactly one shard however the table changes while the shards run.
+GET_FACILITIES_SHARD_QUERY = """
+    SELECT id, name, phone, url, latitude, longitude, country, locality, region, postal_code, street_address
+    FROM facility
+    WHERE mod(id, $3) = $4
+    ORDER BY id
+    OFFSET $1 LIMIT $2;
+"""
+
+# Name under which GET_FACILITIES_SHARD_QUERY is registered as a prepared
+# statement.
+GET_FACILITIES_SHARD_STATEMENT = "get_facilities_shard"
+
+# SQL query to retrieve the facilities with the given ids ($1 is an int
+# array), used to publish incremental updates.
+GET_FACILITIES_BY_IDS_QUERY = """
+    SELECT id, name, phone, url, latitude, longitude, country, locality, region, postal_code, street_address
+    FROM facility
+    WHERE id = ANY($1::int[])
+    ORDER BY id;
+"""
+
+# Name under which GET_FACILITIES_BY_IDS_QUERY is registered as a prepared
+# statement.
+GET_FACILITIES_BY_IDS_STATEMENT = "get_facilities_by_ids"
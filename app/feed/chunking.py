@@ -0,0 +1,110 @@
+import sys
+from typing import Any, List, Sequence
+
+from config import CHUNK_SIZE_MIN, CHUNK_SIZE_MAX, CHUNK_TARGET_SECONDS, \
+    CHUNK_MEMORY_BUDGET
+
+# Number of records sampled by estimate_records_size.
+SIZE_SAMPLE = 8
+
+
+def estimate_records_size(records: Sequence[Any]) -> int:
+    """
+    Estimate the in-memory size of a chunk of records from a few evenly
+    spaced samples.
+
+    :param records: Fetched records, either mappings of column to value
+        or serialised record texts.
+    :return: Estimated size in bytes.
+    """
+    if not records:
+        return 0
+    step = max(len(records) // SIZE_SAMPLE, 1)
+    samples = records[::step][:SIZE_SAMPLE]
+    sampled = sum(_record_size(record) for record in samples)
+    return sampled * len(records) // len(samples)
+
+
+def _record_size(record: Any) -> int:
+    if isinstance(record, (str, bytes)):
+        return sys.getsizeof(record)
+    return sys.getsizeof(record) \
+        + sum(sys.getsizeof(value) for value in record.values())
+
+
+class AdaptiveChunkSizer:
+    """
+    Picks the next chunk size from the measured cost of the previous one.
+
+    Each chunk's fetch and encode time and its in-memory size are turned
+    into smoothed per-row costs. The next size is the largest one expected
+    to stay within both the target latency and the memory budget, moving
+    by at most a factor of two per chunk and kept within the configured
+    bounds.
+
+    Attributes:
+        size (int): Chunk size to use for the next fetch.
+        min_size (int): Smallest allowed chunk size.
+        max_size (int): Largest allowed chunk size.
+        target_seconds (float): Target fetch + encode time per chunk.
+        memory_budget (int): Target in-memory size of a chunk in bytes.
+        sizes (list): Chunk sizes chosen so far, starting with the initial
+            one.
+    """
+
+    # Weight of the newest measurement in the smoothed per-row costs.
+    SMOOTHING = 0.5
+
+    def __init__(self,
+                 initial_size: int,
+                 min_size: int = None,
+                 max_size: int = None,
+                 target_seconds: float = None,
+                 memory_budget: int = None):
+        self.min_size = min_size or CHUNK_SIZE_MIN
+        self.max_size = max_size or CHUNK_SIZE_MAX
+        self.target_seconds = target_seconds or CHUNK_TARGET_SECONDS
+        self.memory_budget = memory_budget or CHUNK_MEMORY_BUDGET
+        self.size = self._clamp(initial_size)
+        self.sizes: List[int] = [self.size]
+        self._seconds_per_row = None
+        self._bytes_per_row = None
+
+    def update(self,
+               rows: int,
+               fetch_seconds: float,
+               encode_seconds: float,
+               size_bytes: int) -> int:
+        """
+        Record the measurements of a chunk and choose the next size.
+
+        :param rows: Number of records in the chunk.
+        :param fetch_seconds: Time spent fetching the chunk.
+        :param encode_seconds: Time spent encoding the chunk.
+        :param size_bytes: Estimated in-memory size of the chunk.
+        :return: Size of the next chunk.
+        """
+        if rows <= 0:
+            return self.size
+
+        self._seconds_per_row = self._smooth(
+            self._seconds_per_row, (fetch_seconds + encode_seconds) / rows)
+        self._bytes_per_row = self._smooth(
+            self._bytes_per_row, size_bytes / rows)
+
+        desired = min(
+            self.target_seconds / max(self._seconds_per_row, 1e-9),
+            self.memory_budget / max(self._bytes_per_row, 1))
+        desired = min(max(desired, self.size / 2), self.size * 2)
+
+        self.size = self._clamp(int(desired))
+        self.sizes.append(self.size)
+        return self.size
+
+    def _smooth(self, current: float, measured: float) -> float:
+        if current is None:
+            return measured
+        return self.SMOOTHING * measured + (1 - self.SMOOTHING) * current
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_size, min(self.max_size, size))
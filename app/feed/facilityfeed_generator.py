@@ -6,14 +6,37 @@ from typing import Any, Dict, List
 from config import FEED_FILE_FORMAT
 
 from app.feed.interfaces import FeedGeneratorInterface
-from app.utils.logger import get_logger
+from app.feed.record_cache import EncodedRecordCache
+from app.utils.logger import SAMPLED, get_logger
 
 
 logger = get_logger(__name__)
 
 
 class FacilityFeedGenerator(FeedGeneratorInterface):
-    """Generates facility feed files in JSON format."""
+    """
+    Generates facility feed files in JSON format.
+
+    Records are encoded one by one and streamed into the gzip file. With a
+    record cache, rows seen in an earlier run are spliced in from their
+    cached encoding instead of being transformed and serialised again.
+
+    Attributes:
+        record_cache (EncodedRecordCache): Optional cache of encoded
+            records.
+        filename_format (str): Feed file name with a ``{timestamp}``
+            placeholder.
+    """
+
+    # Bump whenever transform_record changes so cached encodings are
+    # invalidated.
+    mapping_version = "facility-1"
+
+    def __init__(self,
+                 record_cache: EncodedRecordCache = None,
+                 filename_format: str = None):
+        self.record_cache = record_cache
+        self.filename_format = filename_format or FEED_FILE_FORMAT
 
     def transform_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -40,6 +63,47 @@ class FacilityFeedGenerator(FeedGeneratorInterface):
             }
         }
 
+    def encode_records(self, records: List[Dict[str, Any]]) -> List[bytes]:
+        """
+        Encode records to their JSON representation in the feed.
+
+        :param records: List of facility records.
+        :return: Encoded record for each input record, in order.
+        """
+        if self.record_cache is None:
+            return [json.dumps(self.transform_record(record)).encode()
+                    for record in records]
+
+        keys = self.record_cache.keys_for(records)
+        cached = self.record_cache.get_many(keys)
+        fragments = []
+        encoded = {}
+        for key, record in zip(keys, records):
+            fragment = cached.get(key)
+            if fragment is None:
+                fragment = json.dumps(self.transform_record(record)).encode()
+                encoded[key] = fragment
+            fragments.append(fragment)
+        if encoded:
+            self.record_cache.put_many(encoded)
+        return fragments
+
+    def close(self) -> None:
+        """
+        Write back and close the record cache, if any.
+        """
+        if self.record_cache is not None:
+            self.record_cache.close()
+
+    def entity_ids(self, records: List[Dict[str, Any]]) -> List[int]:
+        """
+        Entity id of each record, read without transforming it.
+
+        :param records: List of facility records.
+        :return: Facility id of each record, in order.
+        """
+        return [record["id"] for record in records]
+
     def generate_feed_file(self,
                            records: List[Dict[str, Any]],
                            timestamp: int = None) -> str:
@@ -49,19 +113,30 @@ class FacilityFeedGenerator(FeedGeneratorInterface):
         :param records: List of facility records.
         :return: Path to the generated feed file.
         """
+        return self.write_feed_file(self.encode_records(records), timestamp)
 
-        feed_data = {"data": [self.transform_record(
-            record) for record in records]}
+    def write_feed_file(self,
+                        fragments: List[bytes],
+                        timestamp: int = None) -> str:
+        """
+        Write a feed file from encoded records.
 
-        filename = FEED_FILE_FORMAT.format(
+        :param fragments: Records encoded by encode_records.
+        :return: Path to the generated feed file.
+        """
+        filename = self.filename_format.format(
             # milliseconds because of async calls
             timestamp=timestamp or int(time.time()*1000)
         )
 
         try:
-            with gzip.open(filename, 'wt', encoding='utf-8') as f:
-                json.dump(feed_data, f)
-            logger.info("Feed file %s generated successfully.", filename)
+            # Same bytes json.dump would write for {"data": [...]}.
+            with gzip.open(filename, 'wb') as f:
+                f.write(b'{"data": [')
+                f.write(b', '.join(fragments))
+                f.write(b']}')
+            logger.info("Feed file %s generated successfully.", filename,
+                        extra=SAMPLED)
             return filename
         except (OSError, IOError) as e:
             logger.error(
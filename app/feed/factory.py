@@ -1,14 +1,70 @@
-from config import FEED_TYPE
+import glob
+import os
+from typing import Callable, Dict
+
+from config import FEED_TYPE, FEED_MAPPINGS_DIR, ENCODED_CACHE_ENABLED, \
+    ENCODED_CACHE_PATH, ENCODED_CACHE_MAX_ENTRIES
 
 from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.facilityjson_generator import FacilityJsonFeedGenerator
 from app.feed.interfaces import FeedGeneratorInterface
+from app.feed.mappedfeed_generator import MappedFeedGenerator
+from app.feed.mapping import FeedMapping
+from app.feed.record_cache import EncodedRecordCache
 
 
 class FeedGeneratorFactory:
-    """Factory class to create feed generator instances."""
+    """
+    Factory class to create feed generator instances.
+
+    Feed types are registered as builder callables. Besides the built-in
+    facility feeds, every mapping file in FEED_MAPPINGS_DIR is registered
+    under its name the first time a generator is requested.
+    """
+
+    _builders: Dict[str, Callable[[], FeedGeneratorInterface]] = {
+        "facility": FacilityFeedGenerator,
+        "facility_json": FacilityJsonFeedGenerator,
+    }
+    _mappings_loaded = False
+
+    @classmethod
+    def register_feed_type(
+            cls,
+            feed_type: str,
+            builder: Callable[[], FeedGeneratorInterface]) -> None:
+        """
+        Register a feed generator builder under a feed type.
+
+        :param feed_type: Name used in the FEED_TYPE setting.
+        :param builder: Callable returning a new generator.
+        """
+        cls._builders[feed_type] = builder
+
+    @classmethod
+    def register_mapping(cls, mapping: FeedMapping) -> None:
+        """
+        Register a declarative mapping under its name.
+
+        :param mapping: Mapping describing the feed's records.
+        """
+        cls.register_feed_type(mapping.name,
+                               lambda: MappedFeedGenerator(mapping))
+
+    @classmethod
+    def load_mappings(cls, directory: str = None) -> None:
+        """
+        Register every JSON or YAML mapping file in a directory.
+
+        :param directory: Directory to scan; defaults to FEED_MAPPINGS_DIR.
+        """
+        directory = directory or FEED_MAPPINGS_DIR
+        for pattern in ("*.json", "*.yaml", "*.yml"):
+            for path in sorted(glob.glob(os.path.join(directory, pattern))):
+                cls.register_mapping(FeedMapping.load(path))
 
-    @staticmethod
-    def get_feed_generator(feed_type=None) -> FeedGeneratorInterface:
+    @classmethod
+    def get_feed_generator(cls, feed_type=None) -> FeedGeneratorInterface:
         """
         Get the appropriate feed generator based on the configuration.
 
@@ -16,7 +72,22 @@ class FeedGeneratorFactory:
         """
         feed_type = feed_type or FEED_TYPE
 
-        if feed_type == "facility":
-            return FacilityFeedGenerator()
+        if not cls._mappings_loaded:
+            # Only marked as loaded once every file was registered, so a
+            # bad mapping file fails each call instead of being skipped.
+            cls.load_mappings()
+            cls._mappings_loaded = True
+
+        builder = cls._builders.get(feed_type)
+        if builder is None:
+            raise ValueError(f"Unsupported feed type: {feed_type}")
 
-        raise ValueError(f"Unsupported feed type: {feed_type}")
+        generator = builder()
+        if ENCODED_CACHE_ENABLED and \
+                isinstance(generator, FacilityFeedGenerator) and \
+                generator.mapping_version:
+            generator.record_cache = EncodedRecordCache(
+                ENCODED_CACHE_PATH,
+                generator.mapping_version,
+                ENCODED_CACHE_MAX_ENTRIES)
+        return generator
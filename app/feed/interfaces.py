@@ -35,16 +35,56 @@ class FeedGeneratorInterface(ABC):
         :return: Transformed record as a dictionary.
         """
 
+    def encode_records(self, records: List[Dict]) -> List[bytes]:
+        """
+        Encode records to the bytes the feed file holds for each of them.
+        Needed for change detection, together with write_feed_file.
+
+        :param records: List of records.
+        :return: Encoded record for each input record, in order.
+        """
+        raise NotImplementedError
+
+    def write_feed_file(self,
+                        fragments: List[bytes],
+                        timestamp: int = None) -> str:
+        """
+        Write a feed file from records encoded by encode_records.
+
+        :param fragments: Encoded records.
+        :return: Path to the generated feed file.
+        """
+        raise NotImplementedError
+
+    def entity_ids(self, records: List[Dict]) -> List[int]:
+        """
+        Entity id of each record, used to track changes per entity.
+
+        :param records: List of records.
+        :return: Entity id for each input record, in order.
+        """
+        return [self.transform_record(record)["entity_id"]
+                for record in records]
+
+    def close(self) -> None:
+        """
+        Release resources held by the generator, such as on-disk caches.
+        """
+
     @staticmethod
     def generate_metadata_file(
             feed_files: List[str],
             feed_name: str,
-            timestamp: int = None) -> str:
+            timestamp: int = None,
+            filename: str = None,
+            run_id: str = None) -> str:
         """
         Generate a metadata descriptor file listing all feed files.
 
         :param feed_files: List of feed files generated.
         :param feed_name: Name of the feed.
+        :param filename: File to write; defaults to METADATA_FILE_FORMAT.
+        :param run_id: Run identifier to record, for shard manifests.
         :return: Path to the generated metadata file.
         """
 
@@ -53,8 +93,10 @@ class FeedGeneratorInterface(ABC):
             "name": feed_name,
             "data_file": feed_files
         }
+        if run_id:
+            metadata["run_id"] = run_id
 
-        metadata_filename = METADATA_FILE_FORMAT
+        metadata_filename = filename or METADATA_FILE_FORMAT
 
         try:
             with open(metadata_filename, "w", encoding="utf-8") as f:
@@ -0,0 +1,252 @@
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, Mapping
+
+CACHE_MAGIC = b"FFREC001"
+# Magic, mapping version length, entry count, data file size and use tick.
+CACHE_PREAMBLE = struct.Struct("<8sIQQQ")
+# Eviction keeps this fraction of max_entries, so compactions are rare.
+EVICT_TO = 0.9
+
+
+class EncodedRecordCache:
+    """
+    On-disk LRU cache of encoded feed records, keyed by raw row content.
+
+    Entries map a 64-bit hash of a database row to the JSON bytes its
+    transformed record encodes to, so unchanged rows can be spliced into
+    feed files without being transformed or serialised again.
+
+    Encoded records are appended to a data file that is read through mmap.
+    A separate index file holds parallel arrays of keys, data offsets,
+    lengths and last-use ticks; it is loaded into a dict on open (roughly
+    100 bytes of memory per entry) and written back on close. Once the
+    cache holds more than max_entries records, the most recently used ones
+    are compacted into a new data file. All entries are dropped when the
+    generator's mapping version changes.
+
+    Attributes:
+        path (str): Location of the data file; the index is ``path.idx``.
+        mapping_version (str): Version of the transform that produced the
+            cached bytes.
+        max_entries (int): Maximum number of cached records.
+        hits (int): Lookups served from the cache.
+        misses (int): Lookups that had to be encoded.
+    """
+
+    def __init__(self, path: str, mapping_version: str, max_entries: int):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.mapping_version = str(mapping_version)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.tick = 0
+        self._reset_index()
+        data_size = self._load_index()
+
+        self._data = open(path, "ab+")  # pylint: disable=consider-using-with
+        # Drop records appended after the index was last written.
+        self._data.truncate(data_size)
+        self._data.seek(0, os.SEEK_END)
+        self._map = None
+        self._slots = {key: slot for slot, key in enumerate(self.keys)}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @classmethod
+    def key_for(cls, record: Mapping[str, Any]) -> int:
+        """
+        Hash the content of a raw database row.
+
+        :param record: Row as fetched from the database.
+        :return: Signed 64-bit key.
+        """
+        return cls.keys_for([record])[0]
+
+    @staticmethod
+    def keys_for(records: Iterable[Mapping[str, Any]]) -> List[int]:
+        """
+        Hash the content of raw database rows.
+
+        Column names are hashed once per distinct set of columns and used
+        to key the hash of each row's values, so equal values under
+        different columns produce different keys.
+
+        :param records: Rows as fetched from the database.
+        :return: Signed 64-bit key for each row, in order.
+        """
+        keys = []
+        columns = salt = None
+        for record in records:
+            names = tuple(record.keys())
+            if names != columns:
+                columns = names
+                salt = blake2b(pickle.dumps(names, protocol=5),
+                               digest_size=16).digest()
+            # pickle encodes floats in binary, which is much faster than
+            # repr.
+            content = pickle.dumps(tuple(record.values()), protocol=5)
+            keys.append(int.from_bytes(
+                blake2b(content, digest_size=8, key=salt).digest(),
+                "little", signed=True))
+        return keys
+
+    def get_many(self, keys: Iterable[int]) -> Dict[int, bytes]:
+        """
+        Look up encoded records and mark the hits as recently used.
+
+        :param keys: Row keys from key_for.
+        :return: Mapping of key to encoded bytes for the cached keys.
+        """
+        self.tick += 1
+        found = {}
+        lookups = 0
+        data = self._mapped()
+        for key in keys:
+            lookups += 1
+            slot = self._slots.get(key)
+            if slot is not None:
+                self.used[slot] = self.tick
+                offset = self.offsets[slot]
+                found[key] = data[offset:offset + self.lengths[slot]]
+        self.hits += len(found)
+        self.misses += lookups - len(found)
+        return found
+
+    def put_many(self, entries: Mapping[int, bytes]) -> None:
+        """
+        Store encoded records, evicting the least recently used ones if
+        the cache grows past max_entries.
+
+        :param entries: Mapping of row key to encoded bytes.
+        """
+        offset = self._data.tell()
+        for key, value in entries.items():
+            self._data.write(value)
+            self._slots[key] = len(self.keys)
+            self.keys.append(key)
+            self.offsets.append(offset)
+            self.lengths.append(len(value))
+            self.used.append(self.tick)
+            offset += len(value)
+        self._data.flush()
+
+        if len(self.keys) > self.max_entries:
+            self._compact(int(self.max_entries * EVICT_TO))
+
+    def clear(self) -> None:
+        """
+        Drop every cached record.
+        """
+        self._compact(0)
+
+    def close(self) -> None:
+        """
+        Write the index and release the data file.
+        """
+        if self._data.closed:
+            return
+        self._write_index()
+        self._unmap()
+        self._data.close()
+
+    def _mapped(self) -> mmap.mmap:
+        size = self._data.tell()
+        if self._map is None or len(self._map) < size:
+            self._unmap()
+            if size:
+                self._map = mmap.mmap(self._data.fileno(), size,
+                                      access=mmap.ACCESS_READ)
+        return self._map
+
+    def _unmap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _compact(self, keep: int) -> None:
+        """
+        Rewrite the data file with the ``keep`` most recently used live
+        entries.
+        """
+        live = sorted(set(self._slots.values()),
+                      key=self.used.__getitem__, reverse=True)[:keep]
+        live.sort()
+        data = self._mapped()
+
+        keys, offsets = array("q"), array("Q")
+        lengths, used = array("I"), array("Q")
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as f:
+            for slot in live:
+                offset = self.offsets[slot]
+                keys.append(self.keys[slot])
+                offsets.append(f.tell())
+                lengths.append(self.lengths[slot])
+                used.append(self.used[slot])
+                f.write(data[offset:offset + self.lengths[slot]])
+
+        self._unmap()
+        self._data.close()
+        os.replace(temp_path, self.path)
+        self._data = open(self.path, "ab+")  # pylint: disable=consider-using-with
+        self._data.seek(0, os.SEEK_END)
+        self.keys, self.offsets, self.lengths, self.used = \
+            keys, offsets, lengths, used
+        self._slots = {key: slot for slot, key in enumerate(self.keys)}
+        self._write_index()
+
+    def _reset_index(self) -> None:
+        self.keys = array("q")
+        self.offsets = array("Q")
+        self.lengths = array("I")
+        self.used = array("Q")
+
+    def _load_index(self) -> int:
+        """
+        Load the index file if it matches the mapping version and the data
+        file.
+
+        :return: Size of the data file the index describes.
+        """
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, version_length, count, data_size, tick = \
+                    CACHE_PREAMBLE.unpack(f.read(CACHE_PREAMBLE.size))
+                version = f.read(version_length).decode("utf-8")
+                if magic != CACHE_MAGIC or version != self.mapping_version:
+                    return 0
+                self.keys.fromfile(f, count)
+                self.offsets.fromfile(f, count)
+                self.lengths.fromfile(f, count)
+                self.used.fromfile(f, count)
+        except (OSError, EOFError, struct.error, UnicodeDecodeError):
+            self._reset_index()
+            return 0
+        if not os.path.exists(self.path) or \
+                os.path.getsize(self.path) < data_size:
+            # Data file lost or truncated behind the index's back.
+            self._reset_index()
+            return 0
+        self.tick = tick
+        return data_size
+
+    def _write_index(self) -> None:
+        version = self.mapping_version.encode("utf-8")
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(CACHE_PREAMBLE.pack(CACHE_MAGIC, len(version),
+                                        len(self.keys), self._data.tell(),
+                                        self.tick))
+            f.write(version)
+            self.keys.tofile(f)
+            self.offsets.tofile(f)
+            self.lengths.tofile(f)
+            self.used.tofile(f)
+        os.replace(temp_path, self.index_path)
@@ -0,0 +1,34 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.feed.change_index import ChangeReport
+from app.utils.loop_monitor import LoopLagReport
+
+
+@dataclass
+class RunReport:
+    """
+    Summary of a single feed run.
+
+    Attributes:
+        records (int): Number of records written to feed files.
+        feed_files (list): Feed files generated by the run.
+        published (bool): Whether the feed and metadata were uploaded.
+        changes (ChangeReport): Entity changes since the last published
+            feed, when change detection is enabled.
+        chunk_sizes (list): Size requested for each chunk fetch.
+        loop_lag (LoopLagReport): Event-loop lag during the run, when the
+            watchdog is enabled.
+        peak_reserved_bytes (int): Most chunk memory reserved at once,
+            when a run memory budget is set.
+        peak_rss_bytes (int): Peak resident set size of the process.
+    """
+
+    records: int = 0
+    feed_files: List[str] = field(default_factory=list)
+    published: bool = False
+    changes: Optional[ChangeReport] = None
+    chunk_sizes: List[int] = field(default_factory=list)
+    loop_lag: Optional[LoopLagReport] = None
+    peak_reserved_bytes: int = 0
+    peak_rss_bytes: int = 0
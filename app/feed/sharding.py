@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+from typing import List, Optional
+
+from config import FEED_NAME, SHARD_COUNT, SHARD_FEED_FILE_FORMAT, \
+    SHARD_MANIFEST_FORMAT, RUN_ID
+
+from app.feed.interfaces import FeedGeneratorInterface
+from app.storage.interfaces import StorageInterface
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def shard_manifest_name(shard_index: int, shard_count: int) -> str:
+    """
+    Name of the partial manifest a shard uploads.
+
+    :param shard_index: Zero-based index of the shard.
+    :param shard_count: Total number of shards.
+    :return: Manifest file name.
+    """
+    return SHARD_MANIFEST_FORMAT.format(index=shard_index, count=shard_count)
+
+
+def shard_feed_file_format(shard_index: int, shard_count: int) -> str:
+    """
+    Feed file name format for a shard, so that shards running at the same
+    time never produce the same file name.
+
+    :param shard_index: Zero-based index of the shard.
+    :param shard_count: Total number of shards.
+    :return: Format with a remaining ``{timestamp}`` placeholder.
+    """
+    return SHARD_FEED_FILE_FORMAT.format(index=shard_index,
+                                         count=shard_count,
+                                         timestamp="{timestamp}")
+
+
+class ShardManifestMerger:
+    """
+    Merges the partial manifests of a sharded run into the single
+    metadata file that an unsharded run publishes.
+
+    The merge reads every partial manifest back from storage and only
+    writes the metadata file once all shards have reported for the same
+    run id, so a manifest left by an earlier run never counts. Feed files
+    are listed in shard order and the newest shard timestamp is used, so
+    the result depends only on the partial manifests and repeating the
+    merge republishes the same metadata.
+
+    Attributes:
+        storage_adapter (StorageInterface): Storage the shards uploaded to.
+        shard_count (int): Number of shards to wait for.
+        feed_name (str): Name written to the metadata file.
+        run_id (str): Run id every manifest must carry.
+    """
+
+    def __init__(self,
+                 storage_adapter: StorageInterface,
+                 shard_count: int = None,
+                 feed_name: str = None,
+                 run_id: str = None):
+        self.storage_adapter = storage_adapter
+        self.shard_count = shard_count or SHARD_COUNT
+        self.feed_name = feed_name or FEED_NAME
+        self.run_id = run_id or RUN_ID
+
+    async def merge(self) -> bool:
+        """
+        Merge the partial manifests and upload the metadata file.
+
+        :return: True if the metadata file was published, False if a
+            shard's manifest is missing or from another run, or the upload
+            failed.
+        """
+        if not self.run_id:
+            logger.error("RUN_ID is not set, not merging.")
+            return False
+        manifests = await self.fetch_manifests()
+        if manifests is None:
+            return False
+        for shard_index, manifest in enumerate(manifests):
+            if manifest.get("run_id") != self.run_id:
+                logger.error("Manifest of shard %d is from run %r, not %r; "
+                             "not merging.", shard_index,
+                             manifest.get("run_id"), self.run_id)
+                return False
+
+        feed_files = []
+        for manifest in manifests:
+            for feed_file in manifest["data_file"]:
+                if feed_file not in feed_files:
+                    feed_files.append(feed_file)
+        timestamp = max(manifest["generation_timestamp"]
+                        for manifest in manifests)
+
+        metadata_file = FeedGeneratorInterface.generate_metadata_file(
+            feed_files, self.feed_name, timestamp)
+        if not metadata_file:
+            return False
+        uploaded = await self.storage_adapter.upload_file(
+            metadata_file,
+            "application/json",
+            "identity")
+        logger.info("Merged %d shard manifests into %s (%d feed files).",
+                    len(manifests), metadata_file, len(feed_files))
+        return uploaded
+
+    async def fetch_manifests(self) -> Optional[List[dict]]:
+        """
+        Download and parse every shard's partial manifest.
+
+        :return: Manifests in shard order, or None if any is missing.
+        """
+        manifests = []
+        with tempfile.TemporaryDirectory() as workdir:
+            for shard_index in range(self.shard_count):
+                name = shard_manifest_name(shard_index, self.shard_count)
+                local_path = os.path.join(workdir, name)
+                if not await self.storage_adapter.download_file(
+                        name, local_path):
+                    logger.error("Manifest %s is missing, not merging.",
+                                 name)
+                    return None
+                with open(local_path, "r", encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+        return manifests
@@ -0,0 +1,277 @@
+import time
+from typing import Dict, List, Optional
+
+import asyncio
+
+from config import UPDATE_CHANNEL, UPDATE_BATCH_WINDOW, \
+    UPDATE_MAX_BATCH_SIZE, UPDATE_FEED_FILE_FORMAT
+
+from app.db.connection import BaseDBConnection
+from app.feed.interfaces import FeedGeneratorInterface
+from app.repositories.facility import FacilityRepository
+from app.storage.interfaces import StorageInterface
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ChangeBatcher:
+    """
+    Debounces changed ids into bounded batches.
+
+    A batch is released ``window`` seconds after its first id arrived, or
+    as soon as it holds ``max_size`` distinct ids, whichever comes first.
+    Ids added while a batch is being processed go into the next batch; if
+    the first of them has already waited ``window`` seconds by the time
+    next_batch is called, that batch is released at once. A batch that
+    could not be published is put back with requeue and released with the
+    next one.
+
+    Attributes:
+        window (float): Longest time an id waits before its batch is
+            released.
+        max_size (int): Largest number of ids in a batch.
+    """
+
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        # Dict keys keep arrival order and drop repeated ids.
+        self._pending: Dict[int, None] = {}
+        # Monotonic time the oldest pending id arrived.
+        self._first_arrival = None
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closed = asyncio.Event()
+
+    def add(self, entity_id: int) -> None:
+        """
+        Record a changed id.
+
+        :param entity_id: Id of the changed entity.
+        """
+        if not self._pending:
+            self._first_arrival = time.monotonic()
+        self._pending[entity_id] = None
+        self._arrived.set()
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+
+    def requeue(self, batch: List[int]) -> None:
+        """
+        Put a batch back in front of the pending ids. Its window starts
+        again unless older ids are pending.
+
+        :param batch: Ids returned by next_batch.
+        """
+        if not self._pending:
+            self._first_arrival = time.monotonic()
+        self._pending = {**dict.fromkeys(batch), **self._pending}
+        self._arrived.set()
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+
+    def close(self) -> None:
+        """
+        Release the pending batch and make next_batch return an empty list
+        once nothing is pending.
+        """
+        self._closed.set()
+        self._arrived.set()
+        self._full.set()
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether close has been called.
+        """
+        return self._closed.is_set()
+
+    async def wait_closed(self, timeout: float) -> None:
+        """
+        Wait until the batcher is closed, or for ``timeout`` seconds.
+
+        :param timeout: Longest wait in seconds.
+        """
+        try:
+            await asyncio.wait_for(self._closed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def next_batch(self) -> List[int]:
+        """
+        Wait for the next batch of changed ids.
+
+        :return: Up to max_size distinct ids, in arrival order; empty once
+            the batcher is closed and drained.
+        """
+        while not self._pending:
+            if self.closed:
+                return []
+            self._arrived.clear()
+            await self._arrived.wait()
+
+        remaining = self._first_arrival + self.window - time.monotonic()
+        if len(self._pending) < self.max_size and not self.closed \
+                and remaining > 0:
+            self._full.clear()
+            try:
+                await asyncio.wait_for(self._full.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        batch = list(self._pending)[:self.max_size]
+        for entity_id in batch:
+            del self._pending[entity_id]
+        # Ids left over from a full batch keep their original deadline.
+        if not self._pending:
+            self._first_arrival = None
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+        return batch
+
+
+class FacilityUpdateService:
+    """
+    Publishes small update feeds for facilities changed since the last
+    batch run, driven by database notifications.
+
+    A trigger on the facility table notifies UPDATE_CHANNEL with the id
+    of every inserted, updated or deleted row. The ids are debounced into
+    batches, the current rows are fetched by id and written to an update
+    feed file, which is uploaded through the storage adapter.
+
+    Update feeds only carry current rows: ids whose rows no longer exist
+    are counted in the log but not published, so partners only see a
+    deletion once the next batch run publishes a feed without the
+    facility. A batch that fails to be fetched or uploaded is logged and
+    retried with the next batch, after a backoff that doubles with every
+    failure in a row, up to max_retry_delay; only the batch pending when
+    the service stops is dropped if it fails. If the LISTEN connection is
+    lost and cannot be restored, run() raises instead of waiting for
+    notifications that never come.
+
+    Attributes:
+        db_connection (BaseDBConnection): Connection to listen on.
+        repository (FacilityRepository): Repository to fetch rows from.
+        storage_adapter (StorageInterface): Storage for update feeds.
+        feed_generator (FeedGeneratorInterface): Generator for update
+            feeds; its file names follow UPDATE_FEED_FILE_FORMAT.
+        channel (str): Notification channel.
+        batcher (ChangeBatcher): Debounces notified ids.
+        retry_delay (float): Backoff after the first failed batch, in
+            seconds.
+        max_retry_delay (float): Longest backoff, in seconds.
+
+    Methods:
+        run(): Listen and publish update feeds until stop() is called.
+        stop(): Publish the pending batch and stop.
+        publish_batch(ids): Publish an update feed for a batch of ids.
+    """
+
+    def __init__(self,
+                 db_connection: BaseDBConnection,
+                 repository: FacilityRepository,
+                 storage_adapter: StorageInterface,
+                 feed_generator: FeedGeneratorInterface,
+                 channel: str = None,
+                 batch_window: float = None,
+                 max_batch_size: int = None):
+        self.db_connection = db_connection
+        self.repository = repository
+        self.storage_adapter = storage_adapter
+        self.feed_generator = feed_generator
+        self.feed_generator.filename_format = UPDATE_FEED_FILE_FORMAT
+        self.channel = channel or UPDATE_CHANNEL
+        self.batcher = ChangeBatcher(batch_window or UPDATE_BATCH_WINDOW,
+                                     max_batch_size or UPDATE_MAX_BATCH_SIZE)
+        self.retry_delay = 1.0
+        self.max_retry_delay = 60.0
+        self._listen_error = None
+
+    async def run(self) -> None:
+        await self.db_connection.listen(self.channel,
+                                        self._on_notification,
+                                        self._on_listen_lost)
+        failures = 0
+        try:
+            while True:
+                batch = await self.batcher.next_batch()
+                if not batch:
+                    break
+                if await self._try_publish(batch):
+                    failures = 0
+                    continue
+                failures += 1
+                if self.batcher.closed:
+                    logger.error("Dropping %d changed facilities; they are "
+                                 "published by the next batch run.",
+                                 len(batch))
+                    continue
+                self.batcher.requeue(batch)
+                await self.batcher.wait_closed(min(
+                    self.retry_delay * 2 ** (failures - 1),
+                    self.max_retry_delay))
+        finally:
+            await self.db_connection.unlisten(self.channel)
+        if self._listen_error is not None:
+            raise ConnectionError(
+                f"Lost LISTEN on {self.channel}") from self._listen_error
+
+    def stop(self) -> None:
+        self.batcher.close()
+
+    async def publish_batch(self, ids: List[int]) -> Optional[str]:
+        """
+        Fetch the current rows of a batch of ids and upload them as an
+        update feed file.
+
+        :param ids: Changed facility ids.
+        :return: Uploaded feed file, or None if every facility was deleted.
+        :raises RuntimeError: If the feed file could not be generated or
+            uploaded.
+        """
+        records = await self.repository.fetch_facilities_by_ids(ids)
+        deleted = len(ids) - len(records)
+        if deleted:
+            logger.info("%d of %d changed facilities were deleted; "
+                        "deletions are published by the next batch run.",
+                        deleted, len(ids))
+        if not records:
+            return None
+
+        feed_file = self.feed_generator.generate_feed_file(records)
+        if not feed_file:
+            raise RuntimeError(
+                f"Failed to generate update feed for {len(records)} "
+                "facilities.")
+        if not await self.storage_adapter.upload_file(
+                feed_file, "application/json", "gzip"):
+            raise RuntimeError(f"Failed to upload update feed {feed_file}.")
+        logger.info("Published update feed %s with %d facilities.",
+                    feed_file, len(records))
+        return feed_file
+
+    async def _try_publish(self, batch: List[int]) -> bool:
+        try:
+            await self.publish_batch(batch)
+            return True
+        # A long-running listener must outlive any single failed batch,
+        # whatever the driver or storage raised.
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to publish %d changed facilities: %s",
+                         len(batch), e)
+            return False
+
+    def _on_listen_lost(self, error: Exception) -> None:
+        logger.error("Stopping: LISTEN on %s could not be restored: %s",
+                     self.channel, error)
+        self._listen_error = error
+        # Publish what was already notified, then stop.
+        self.batcher.close()
+
+    def _on_notification(self, payload: str) -> None:
+        try:
+            self.batcher.add(int(payload))
+        except ValueError:
+            logger.warning("Ignoring notification with payload %r.", payload)
@@ -1,6 +1,8 @@
-from typing import List
+from typing import Any, Dict, List, Sequence
 
-from app.db.queries import GET_FACILITIES_QUERY
+from app.db.queries import GET_FACILITIES_QUERY, GET_FACILITIES_STATEMENT, \
+    GET_FACILITIES_PROBE_QUERY, GET_FACILITIES_BY_IDS_QUERY, \
+    GET_FACILITIES_BY_IDS_STATEMENT
 from app.db.connection import BaseDBConnection
 
 
@@ -8,18 +10,32 @@ class FacilityRepository:
     """
     Repository class for managing facility data.
     This class is responsible for fetching facility data from the database.
-    It uses an asynchronous database connection to execute queries.
+    It uses an asynchronous database connection to execute queries, with
+    the chunk query registered as a named prepared statement.
 
     Attributes:
         db_connection (BaseDBConnection): DB conn object.
+        chunk_statement (str): Name of the chunk statement.
+        chunk_query (str): Query text of the chunk statement. Subclasses
+            that page through another query override both, so only the
+            statement they execute is registered.
 
     Methods:
         fetch_facilities_chunk(offset, chunk_size): Fetch a chunk of facility
             data from the database.
+        fetch_facilities_probe(): Fetch the row count, max id and content
+            checksum of the facility table.
+        fetch_facilities_by_ids(ids): Fetch specific facilities.
     """
 
+    chunk_statement = GET_FACILITIES_STATEMENT
+    chunk_query = GET_FACILITIES_QUERY
+
     def __init__(self, db_connection: BaseDBConnection):
         self.db_connection = db_connection
+        self.db_connection.prepare_statement(
+            self.chunk_statement,
+            self.chunk_query)
 
     async def fetch_facilities_chunk(self,
                                      offset: int,
@@ -33,7 +49,40 @@ class FacilityRepository:
         :param chunk_size: The number of records to fetch.
         :return: A list of facility records.
         """
-        return await self.db_connection.execute_query(
-            GET_FACILITIES_QUERY,
+        return await self.db_connection.execute_prepared(
+            GET_FACILITIES_STATEMENT,
             offset,
             chunk_size)
+
+    async def fetch_facilities_probe(self) -> Dict[str, Any]:
+        """
+        Fetch the row count, highest id and a content checksum of the
+        facility table, used to tell whether cached copies of the table are
+        still current. The checksum covers updates to existing rows, which
+        the count and max id alone would miss.
+
+        :return: Dictionary with ``row_count``, ``max_id`` and
+            ``checksum``.
+        """
+        rows = await self.db_connection.execute_query(
+            GET_FACILITIES_PROBE_QUERY)
+        return dict(rows[0])
+
+    async def fetch_facilities_by_ids(self,
+                                      ids: Sequence[int]) -> List[dict]:
+        """
+        Fetch the facilities with the given ids, ordered by id. Ids that
+        no longer exist are left out.
+
+        The statement is registered on first use, so batch runs do not
+        prepare it on every pooled connection.
+
+        :param ids: Facility ids.
+        :return: A list of facility records.
+        """
+        self.db_connection.prepare_statement(
+            GET_FACILITIES_BY_IDS_STATEMENT,
+            GET_FACILITIES_BY_IDS_QUERY)
+        return await self.db_connection.execute_prepared(
+            GET_FACILITIES_BY_IDS_STATEMENT,
+            list(ids))
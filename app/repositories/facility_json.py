@@ -0,0 +1,38 @@
+from typing import List
+
+from app.db.queries import GET_FACILITIES_JSON_QUERY, \
+    GET_FACILITIES_JSON_STATEMENT
+from app.repositories.facility import FacilityRepository
+
+
+class FacilityJsonRepository(FacilityRepository):
+    """
+    Repository that has the database build each facility's feed record.
+
+    Chunks are lists of JSON texts, one per facility, already in the
+    shape FacilityFeedGenerator.transform_record produces. Pair it with
+    FacilityJsonFeedGenerator. Requires PostgreSQL.
+
+    Methods:
+        fetch_facilities_chunk(offset, chunk_size): Fetch a chunk of
+            serialised feed records.
+    """
+
+    chunk_statement = GET_FACILITIES_JSON_STATEMENT
+    chunk_query = GET_FACILITIES_JSON_QUERY
+
+    async def fetch_facilities_chunk(self,
+                                     offset: int,
+                                     chunk_size: int) -> List[str]:
+        """
+        Fetch a chunk of serialised feed records, ordered by id.
+
+        :param offset: The starting point for the query.
+        :param chunk_size: The number of records to fetch.
+        :return: JSON text of each feed record.
+        """
+        rows = await self.db_connection.execute_prepared(
+            GET_FACILITIES_JSON_STATEMENT,
+            offset,
+            chunk_size)
+        return [row["record"] for row in rows]
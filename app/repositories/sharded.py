@@ -0,0 +1,56 @@
+from typing import List
+
+from config import SHARD_INDEX, SHARD_COUNT
+
+from app.db.queries import GET_FACILITIES_SHARD_QUERY, \
+    GET_FACILITIES_SHARD_STATEMENT
+from app.db.connection import BaseDBConnection
+from app.repositories.facility import FacilityRepository
+
+
+class ShardedFacilityRepository(FacilityRepository):
+    """
+    Repository that only serves the facilities of one shard.
+
+    Facilities are assigned to shards by their id modulo SHARD_COUNT, so
+    the shards never depend on when each task looked at the table: every
+    id, including ones inserted while the shards run, belongs to exactly
+    one shard. This repository pages through shard SHARD_INDEX.
+
+    Attributes:
+        shard_index (int): Zero-based index of this shard.
+        shard_count (int): Total number of shards.
+    """
+
+    chunk_statement = GET_FACILITIES_SHARD_STATEMENT
+    chunk_query = GET_FACILITIES_SHARD_QUERY
+
+    def __init__(self,
+                 db_connection: BaseDBConnection,
+                 shard_index: int = None,
+                 shard_count: int = None):
+        super().__init__(db_connection)
+        self.shard_index = SHARD_INDEX if shard_index is None \
+            else shard_index
+        self.shard_count = shard_count or SHARD_COUNT
+        if not 0 <= self.shard_index < self.shard_count:
+            raise ValueError(
+                f"Shard index {self.shard_index} out of range for "
+                f"{self.shard_count} shards")
+
+    async def fetch_facilities_chunk(self,
+                                     offset: int,
+                                     chunk_size: int) -> List[dict]:
+        """
+        Fetch a chunk of this shard's facilities, ordered by id.
+
+        :param offset: The starting point within the shard.
+        :param chunk_size: The number of records to fetch.
+        :return: A list of facility records.
+        """
+        return await self.db_connection.execute_prepared(
+            GET_FACILITIES_SHARD_STATEMENT,
+            offset,
+            chunk_size,
+            self.shard_count,
+            self.shard_index)
@@ -0,0 +1,347 @@
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+import asyncio
+
+from config import SNAPSHOT_PATH, SNAPSHOT_MAX_AGE
+from app.db.connection import BaseDBConnection
+from app.repositories.facility import FacilityRepository
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_MAGIC = b"FFSNAP01"
+# Magic followed by the length of the JSON header.
+SNAPSHOT_PREAMBLE = struct.Struct("<8sI")
+
+INT_COLUMN = "i"
+FLOAT_COLUMN = "f"
+TEXT_COLUMN = "s"
+
+
+class _ColumnBuilder:
+    """
+    Accumulates the values of one column in compact typed buffers.
+
+    The column kind is taken from the first non-null value: ints become
+    int64, floats float64 and everything else UTF-8 text. An int column
+    that later sees a float is promoted to float64.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.kind = None
+        self.nulls = bytearray()
+        self.values = None
+        self.offsets = array("q", [0])
+        self.text = bytearray()
+
+    def append(self, value: Any) -> None:
+        if value is not None and self.kind is None:
+            self._set_kind(value)
+        self.nulls.append(value is None)
+
+        if self.kind is None:
+            return
+        if self.kind == TEXT_COLUMN:
+            if value is not None:
+                self.text += str(value).encode("utf-8")
+            self.offsets.append(len(self.text))
+            return
+        if isinstance(value, float) and self.kind == INT_COLUMN:
+            self.kind = FLOAT_COLUMN
+            self.values = array("d", self.values)
+        self.values.append(0 if value is None else value)
+
+    def _set_kind(self, value: Any) -> None:
+        pending = len(self.nulls)
+        if isinstance(value, int) and not isinstance(value, bool):
+            self.kind = INT_COLUMN
+            self.values = array("q", bytes(8 * pending))
+        elif isinstance(value, float):
+            self.kind = FLOAT_COLUMN
+            self.values = array("d", bytes(8 * pending))
+        else:
+            self.kind = TEXT_COLUMN
+            self.offsets.extend([0] * pending)
+
+    def sections(self) -> List[bytes]:
+        if self.kind is None:
+            # Column holding only nulls, stored as empty text.
+            self.kind = TEXT_COLUMN
+            self.offsets.extend([0] * len(self.nulls))
+        if self.kind == TEXT_COLUMN:
+            return [bytes(self.nulls), self.offsets.tobytes(),
+                    bytes(self.text)]
+        return [bytes(self.nulls), self.values.tobytes()]
+
+
+class SnapshotWriter:
+    """
+    Builds a snapshot file from chunks of records.
+
+    Values are packed column by column as chunks arrive, so building a
+    snapshot never holds the whole table as Python objects.
+    """
+
+    def __init__(self):
+        self.builders = None
+        self.row_count = 0
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Add a chunk of records, ordered by id.
+
+        :param records: Facility records.
+        """
+        for record in records:
+            if self.builders is None:
+                self.builders = [_ColumnBuilder(name)
+                                 for name in record.keys()]
+            for builder, value in zip(self.builders, record.values()):
+                builder.append(value)
+            self.row_count += 1
+
+    def write(self, path: str, probe: Dict[str, Any]) -> None:
+        """
+        Write the snapshot, replacing any existing file atomically.
+
+        :param path: Location of the snapshot file.
+        :param probe: Invalidation probe taken before the records were read.
+        """
+        columns = []
+        payload = []
+        position = 0
+        for builder in self.builders or []:
+            sections = []
+            for section in builder.sections():
+                padding = -position % 8
+                payload.append(bytes(padding))
+                position += padding
+                sections.append((position, len(section)))
+                payload.append(section)
+                position += len(section)
+            columns.append({"name": builder.name,
+                            "kind": builder.kind,
+                            "sections": sections})
+
+        header = json.dumps({"created_at": time.time(),
+                             "row_count": self.row_count,
+                             "probe": probe,
+                             "columns": columns}).encode("utf-8")
+        # Pad the header so the data sections start 8-byte aligned.
+        header += b" " * (-(SNAPSHOT_PREAMBLE.size + len(header)) % 8)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(SNAPSHOT_PREAMBLE.pack(SNAPSHOT_MAGIC, len(header)))
+            f.write(header)
+            for section in payload:
+                f.write(section)
+        os.replace(temp_path, path)
+
+
+class FacilitySnapshot:
+    """
+    Read-only, memory-mapped, column-oriented snapshot of the facility
+    table.
+
+    The file starts with a magic string and a small JSON header (the
+    index) holding the row count, the invalidation probe and, per column,
+    its kind and the offsets of its null mask and data sections. Rows are
+    materialised on demand, so only the slices a chunk needs are decoded.
+
+    Attributes:
+        path (str): Location of the snapshot file.
+        header (dict): Decoded snapshot header.
+        row_count (int): Number of rows in the snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = SNAPSHOT_PREAMBLE.unpack_from(self._mmap)
+        if magic != SNAPSHOT_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a facility snapshot: {path}")
+        data_start = SNAPSHOT_PREAMBLE.size + header_length
+        self.header = json.loads(
+            self._mmap[SNAPSHOT_PREAMBLE.size:data_start])
+        self.row_count = self.header["row_count"]
+
+        self._view = memoryview(self._mmap)
+        self._columns = []
+        for column in self.header["columns"]:
+            sections = [self._view[data_start + start:
+                                   data_start + start + length]
+                        for start, length in column["sections"]]
+            if column["kind"] == TEXT_COLUMN:
+                nulls, offsets, text = sections
+                data = (offsets.cast("q"), text)
+            else:
+                nulls, values = sections
+                data = values.cast(
+                    "q" if column["kind"] == INT_COLUMN else "d")
+            self._columns.append((column["name"], column["kind"], nulls,
+                                  data))
+        self._ids = next((data for name, kind, _, data in self._columns
+                          if name == "id" and kind == INT_COLUMN), None)
+
+    def is_fresh(self, probe: Dict[str, Any], max_age: float = None) -> bool:
+        """
+        Check whether the snapshot still matches the source table.
+
+        :param probe: Current invalidation probe of the table.
+        :param max_age: Maximum snapshot age in seconds, if any.
+        :return: True if the snapshot can be served.
+        """
+        if max_age is not None and \
+                time.time() - self.header["created_at"] > max_age:
+            return False
+        return self.header["probe"] == probe
+
+    def rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """
+        Materialise the rows in ``[start, stop)`` as dictionaries.
+
+        :param start: Index of the first row.
+        :param stop: Index after the last row.
+        :return: List of facility records.
+        """
+        stop = min(stop, self.row_count)
+        if start >= stop:
+            return []
+        columns = []
+        for name, kind, nulls, data in self._columns:
+            if kind == TEXT_COLUMN:
+                offsets, text = data
+                values = [str(text[offsets[i]:offsets[i + 1]], "utf-8")
+                          for i in range(start, stop)]
+            else:
+                values = data[start:stop].tolist()
+            columns.append((name, [None if nulls[start + i] else value
+                                   for i, value in enumerate(values)]))
+        names = [name for name, _ in columns]
+        return [dict(zip(names, row))
+                for row in zip(*(values for _, values in columns))]
+
+    def index_of(self, entity_id: int) -> Optional[int]:
+        """
+        Find the row index of a facility id using the sorted id column.
+
+        :param entity_id: Facility id.
+        :return: Row index, or None if the id is not in the snapshot.
+        """
+        if self._ids is None:
+            return None
+        index = bisect_left(self._ids, entity_id)
+        if index < self.row_count and self._ids[index] == entity_id:
+            return index
+        return None
+
+    def close(self) -> None:
+        # Views must be released before the mmap can be closed.
+        for _, _, nulls, data in self._columns:
+            nulls.release()
+            for view in data if isinstance(data, tuple) else (data,):
+                view.release()
+        self._columns = []
+        self._ids = None
+        self._view.release()
+        self._mmap.close()
+
+
+class SnapshotFacilityRepository(FacilityRepository):
+    """
+    Facility repository that serves chunks from a local snapshot file.
+
+    The first fetch probes the table (row count, max id and a checksum of
+    every row's content). If the snapshot on disk matches the probe and is
+    younger than max_age, it is served as is; otherwise the whole table is
+    read once from the database and written to a new snapshot. Retries and
+    further generators in the same or later runs then read from the
+    snapshot without touching the database.
+
+    Attributes:
+        snapshot_path (str): Location of the snapshot file.
+        max_age (float): Maximum snapshot age in seconds.
+        fetch_size (int): Chunk size used to read the table when building.
+    """
+
+    def __init__(self,
+                 db_connection: BaseDBConnection,
+                 snapshot_path: str = None,
+                 max_age: float = None,
+                 fetch_size: int = 1000):
+        super().__init__(db_connection)
+        self.snapshot_path = snapshot_path or SNAPSHOT_PATH
+        self.max_age = SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self.fetch_size = fetch_size
+        self._snapshot = None
+
+    async def fetch_facilities_chunk(self,
+                                     offset: int,
+                                     chunk_size: int) -> List[dict]:
+        """
+        Fetch a chunk of facility data from the snapshot.
+
+        :param offset: The starting point for the query.
+        :param chunk_size: The number of records to fetch.
+        :return: A list of facility records.
+        """
+        if self._snapshot is None:
+            self._snapshot = await self.load_snapshot()
+        return self._snapshot.rows(offset, offset + chunk_size)
+
+    async def load_snapshot(self) -> FacilitySnapshot:
+        """
+        Open the snapshot file, rebuilding it from the database if it is
+        missing, unreadable or stale.
+
+        :return: Snapshot matching the current table.
+        """
+        probe = await self.fetch_facilities_probe()
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                snapshot = FacilitySnapshot(self.snapshot_path)
+                if snapshot.is_fresh(probe, self.max_age):
+                    logger.info("Serving facilities from snapshot %s.",
+                                self.snapshot_path)
+                    return snapshot
+                snapshot.close()
+                logger.info("Snapshot %s is stale.", self.snapshot_path)
+            except (OSError, ValueError) as e:
+                logger.error("Failed to read snapshot %s: %s",
+                             self.snapshot_path, e)
+
+        writer = SnapshotWriter()
+        while True:
+            chunk = await super().fetch_facilities_chunk(
+                writer.row_count, self.fetch_size)
+            if not chunk:
+                break
+            writer.append(chunk)
+
+        await asyncio.to_thread(writer.write, self.snapshot_path, probe)
+        logger.info("Snapshot %s written with %d facilities.",
+                    self.snapshot_path, writer.row_count)
+        return FacilitySnapshot(self.snapshot_path)
+
+    def invalidate(self) -> None:
+        """
+        Drop the snapshot so the next fetch reads from the database.
+        """
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        if os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
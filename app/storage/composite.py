@@ -0,0 +1,151 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import asyncio
+
+from app.storage.interfaces import StorageInterface
+from app.utils.logger import SAMPLED, get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class DestinationMetrics:
+    """
+    Upload counters for a single destination.
+
+    Attributes:
+        uploads (int): Files uploaded successfully.
+        failures (int): Files that failed after every retry.
+        attempts (int): Upload attempts, including retries.
+        seconds (float): Total time spent uploading, including retries.
+        max_seconds (float): Slowest single file, including retries.
+    """
+
+    uploads: int = 0
+    failures: int = 0
+    attempts: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class CompositeStorageAdapter(StorageInterface):
+    """
+    Storage adapter that uploads every file to several destinations at
+    once.
+
+    Each destination is uploaded to concurrently and retried on its own
+    with exponential backoff, so a slow or failing destination never
+    delays the others. Destinations are made to keep the source file; it
+    is deleted only once every destination has confirmed the upload.
+
+    Attributes:
+        adapters (dict): Destination name to storage adapter. Adapters
+            must support ``keep_source``.
+        keep_source (bool): Leave the source file in place after upload.
+        metrics (dict): Destination name to DestinationMetrics.
+    """
+
+    def __init__(self,
+                 adapters: Dict[str, StorageInterface],
+                 keep_source: bool = False):
+        if not adapters:
+            raise ValueError("At least one destination is required")
+        for name, adapter in adapters.items():
+            if not hasattr(adapter, "keep_source"):
+                raise ValueError(
+                    f"Storage adapter {name!r} cannot keep the source file")
+            adapter.keep_source = True
+        self.adapters = adapters
+        self.keep_source = keep_source
+        self.metrics = {name: DestinationMetrics() for name in adapters}
+
+    async def upload_file(self,
+                          file_path: str,
+                          content_type: str,
+                          content_encoding: str,
+                          retries: int = 3,
+                          initial_delay: float = 2.0) -> bool:
+        results = await asyncio.gather(*(
+            self._upload(name, adapter, file_path, content_type,
+                         content_encoding, retries, initial_delay)
+            for name, adapter in self.adapters.items()))
+
+        if not all(results):
+            failed = [name for name, result in zip(self.adapters, results)
+                      if not result]
+            logger.error("Upload of %s failed for %s; keeping the file.",
+                         file_path, ", ".join(failed))
+            return False
+
+        if not self.keep_source:
+            try:
+                os.remove(file_path)
+            except OSError as delete_err:
+                logger.error("Failed to delete file %s: %s",
+                             file_path, delete_err)
+        return True
+
+    async def download_file(self, key: str, destination_path: str) -> bool:
+        """
+        Download a file from the first destination that has it.
+        """
+        for adapter in self.adapters.values():
+            if await adapter.download_file(key, destination_path):
+                return True
+        return False
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarise upload timings per destination.
+
+        :return: Mapping of destination name to its counters, with
+            latencies in milliseconds.
+        """
+        return {
+            name: {
+                "uploads": metrics.uploads,
+                "failures": metrics.failures,
+                "retries": metrics.attempts - metrics.uploads
+                - metrics.failures,
+                "total_ms": round(metrics.seconds * 1000, 3),
+                "max_ms": round(metrics.max_seconds * 1000, 3),
+            }
+            for name, metrics in self.metrics.items()
+        }
+
+    async def _upload(self,
+                      name: str,
+                      adapter: StorageInterface,
+                      file_path: str,
+                      content_type: str,
+                      content_encoding: str,
+                      retries: int,
+                      initial_delay: float) -> bool:
+        metrics = self.metrics[name]
+        start = time.perf_counter()
+        uploaded = False
+        for attempt in range(1, retries + 1):
+            metrics.attempts += 1
+            # The composite owns retries, so each call is a single attempt.
+            uploaded = await adapter.upload_file(
+                file_path, content_type, content_encoding, retries=1)
+            if uploaded or attempt == retries:
+                break
+            delay = initial_delay * (2 ** (attempt - 1))
+            logger.info("Retrying upload of %s to %s in %s seconds...",
+                        file_path, name, delay)
+            await asyncio.sleep(delay)
+
+        seconds = time.perf_counter() - start
+        metrics.seconds += seconds
+        metrics.max_seconds = max(metrics.max_seconds, seconds)
+        if uploaded:
+            metrics.uploads += 1
+            logger.info("Uploaded %s to %s in %.1f ms.", file_path, name,
+                        seconds * 1000, extra=SAMPLED)
+        else:
+            metrics.failures += 1
+        return uploaded
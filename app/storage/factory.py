@@ -0,0 +1,57 @@
+import importlib
+
+from config import STORAGE_TYPE
+
+from app.storage.composite import CompositeStorageAdapter
+from app.storage.interfaces import StorageInterface
+
+
+class StorageAdapterFactory:
+    """
+    Factory class to create storage adapter instances.
+
+    Adapters are registered by dotted path and only imported when they are
+    requested, so a local-storage run never imports the S3 SDK. A
+    comma-separated storage type, e.g. ``"s3,local"``, uploads to every
+    listed destination through a CompositeStorageAdapter.
+    """
+
+    _adapters = {
+        "s3": "app.storage.s3:S3StorageAdapter",
+        "local": "app.storage.local:LocalStorageAdapter",
+    }
+
+    @classmethod
+    def register_storage_adapter(cls, storage_type: str, path: str) -> None:
+        """
+        Register a storage adapter under a storage type.
+
+        :param storage_type: Name used in the STORAGE_TYPE setting.
+        :param path: Adapter location as ``"package.module:ClassName"``.
+        """
+        cls._adapters[storage_type] = path
+
+    @classmethod
+    def get_storage_adapter(cls, storage_type=None) -> StorageInterface:
+        """
+        Get the appropriate storage adapter based on the configuration.
+
+        :return: Instance of the storage adapter.
+        """
+        storage_type = storage_type or STORAGE_TYPE
+
+        if "," in storage_type:
+            return CompositeStorageAdapter({
+                name: cls.get_storage_adapter(name)
+                for name in (part.strip() for part in storage_type.split(","))
+                if name
+            })
+
+        path = cls._adapters.get(storage_type)
+        if path is None:
+            raise ValueError(f"Unsupported storage type: {storage_type}")
+
+        module_name, class_name = path.split(":")
+        adapter_class = getattr(importlib.import_module(module_name),
+                                class_name)
+        return adapter_class()
@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import List
+
+import asyncio
 
 
 class StorageInterface(ABC):
@@ -8,6 +11,19 @@ class StorageInterface(ABC):
     to a storage service.
     """
 
+    async def download_file(self, key: str, destination_path: str) -> bool:
+        """
+        Download a stored file, e.g. a partial manifest written by another
+        shard.
+
+        :param key: Name the file was uploaded under.
+        :param destination_path: Local path to write the file to.
+        :return: True if the file was downloaded, False if it is missing
+            or could not be read.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support downloads")
+
     @abstractmethod
     async def upload_file(self,
                           file_path: str,
@@ -26,3 +42,27 @@ class StorageInterface(ABC):
         :raises Exception: If the upload fails after the specified number of retries.
         :return: True if the upload is successful, False otherwise.
         """
+
+    async def upload_files(self,
+                           file_paths: List[str],
+                           content_type: str,
+                           content_encoding: str,
+                           max_concurrency: int = 8) -> List[bool]:
+        """
+        Upload several files concurrently.
+
+        :param file_paths: Paths to the files to be uploaded.
+        :param content_type: MIME type of the files.
+        :param content_encoding: Content encoding of the files.
+        :param max_concurrency: Maximum number of uploads in flight.
+        :return: Upload result for each file, in the order given.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def upload(file_path: str) -> bool:
+            async with semaphore:
+                return await self.upload_file(
+                    file_path, content_type, content_encoding)
+
+        return list(await asyncio.gather(
+            *(upload(file_path) for file_path in file_paths)))
@@ -1,41 +1,119 @@
+import errno
 import os
 
+import asyncio
+
+from config import LOCAL_STORAGE_DIR
 from app.storage.interfaces import StorageInterface
 
-from app.utils.logger import get_logger
+from app.utils.logger import SAMPLED, get_logger
 
 logger = get_logger(__name__)
 
 
 class LocalStorageAdapter(StorageInterface):
+    """
+    Storage adapter that "uploads" files into a local directory.
+
+    Files are renamed (or hard-linked when the source is kept) into the
+    destination directory when both are on the same filesystem, and copied
+    in-kernel with copy_file_range/sendfile otherwise. The file work runs
+    in a worker thread so it never blocks the event loop.
+
+    Attributes:
+        destination_dir (str): Directory files are stored in.
+        keep_source (bool): Leave the source file in place after upload.
+    """
+
+    def __init__(self, destination_dir: str = None, keep_source=False):
+        self.destination_dir = destination_dir or LOCAL_STORAGE_DIR
+        self.keep_source = keep_source
+
     async def upload_file(self,
                           file_path: str,
                           content_type: str,
                           content_encoding: str,
                           retries: int = 3,
                           initial_delay: float = 2.0) -> bool:
-        destination_dir = "local_storage"
+        try:
+            destination_path = await asyncio.to_thread(
+                self._store_file, file_path)
+            logger.info("File %s uploaded successfully to %s.",
+                        file_path, destination_path, extra=SAMPLED)
+            return True
+        except OSError as e:
+            logger.error("Failed to upload file %s: %s", file_path, e)
+            return False
 
-        os.makedirs(destination_dir, exist_ok=True)
+    async def download_file(self, key: str, destination_path: str) -> bool:
+        source_path = os.path.join(self.destination_dir, key)
+        try:
+            await asyncio.to_thread(_copy_file, source_path, destination_path)
+            return True
+        except OSError as e:
+            logger.error("Failed to download file %s: %s", key, e)
+            return False
+
+    def _store_file(self, file_path: str) -> str:
+        os.makedirs(self.destination_dir, exist_ok=True)
         destination_path = os.path.join(
-            destination_dir, os.path.basename(file_path))
+            self.destination_dir, os.path.basename(file_path))
 
         try:
-            with open(file_path, 'rb') as source_file:
-                with open(destination_path, 'wb') as dest_file:
-                    dest_file.write(source_file.read())
-            logger.info("File %s uploaded successfully to %s.",
-                        file_path, destination_path)
+            if self.keep_source:
+                if os.path.exists(destination_path):
+                    os.remove(destination_path)
+                os.link(file_path, destination_path)
+            else:
+                os.replace(file_path, destination_path)
+            return destination_path
+        except OSError as e:
+            # EXDEV: source and destination are on different filesystems.
+            # EPERM: the filesystem does not support hard links.
+            if e.errno not in (errno.EXDEV, errno.EPERM):
+                raise
 
+        _copy_file(file_path, destination_path)
+        if not self.keep_source:
             try:
                 os.remove(file_path)
                 logger.info(
-                    "File %s deleted after successful upload.", file_path)
+                    "File %s deleted after successful upload.", file_path,
+                    extra=SAMPLED)
             except OSError as delete_err:
                 logger.error("Failed to delete file %s: %s",
                              file_path, delete_err)
+        return destination_path
 
-            return True
-        except OSError as e:
-            logger.error("Failed to upload file %s: %s", file_path, e)
-            return False
+
+def _copy_file(source_path: str, destination_path: str) -> None:
+    """
+    Copy a file without passing its contents through user space, using
+    copy_file_range where available and falling back to sendfile.
+
+    :param source_path: Path of the file to copy.
+    :param destination_path: Path of the copy.
+    """
+    with open(source_path, 'rb') as source_file, \
+            open(destination_path, 'wb') as dest_file:
+        remaining = os.fstat(source_file.fileno()).st_size
+        copy = getattr(os, "copy_file_range", None)
+        while remaining > 0:
+            try:
+                if copy is not None:
+                    copied = copy(source_file.fileno(), dest_file.fileno(),
+                                  remaining)
+                else:
+                    copied = os.sendfile(dest_file.fileno(),
+                                         source_file.fileno(),
+                                         None, remaining)
+            except OSError as e:
+                # Not supported between these filesystems, use sendfile.
+                if copy is None or e.errno not in (
+                        errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP):
+                    raise
+                copy = None
+                continue
+            if copied == 0:
+                break
+            remaining -= copied
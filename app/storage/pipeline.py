@@ -0,0 +1,122 @@
+import os
+from typing import List
+
+import asyncio
+
+from app.storage.interfaces import StorageInterface
+from app.utils.logger import SAMPLED, get_logger
+from app.utils.memory_budget import MemoryBudget
+
+logger = get_logger(__name__)
+
+
+class UploadPipeline:
+    """
+    Uploads the feed files of a run as they are generated.
+
+    Without a memory budget, each file is uploaded before submit()
+    returns. With one, uploads run in the background and overlap the
+    next chunks; each keeps its file's reservation until it ends, and a
+    failing upload only marks the run as not uploaded. While
+    ``holding`` is set, submitted files are kept back instead, to be
+    uploaded with the next file that is not held, by finish(), or removed
+    by discard().
+
+    Attributes:
+        storage_adapter (StorageInterface): Storage to upload to.
+        budget (MemoryBudget): Run memory budget, if any.
+        holding (bool): Keep submitted files back.
+        held (list): Files kept back so far.
+        uploaded (bool): Whether every finished upload succeeded.
+    """
+
+    def __init__(self,
+                 storage_adapter: StorageInterface,
+                 budget: MemoryBudget = None):
+        self.storage_adapter = storage_adapter
+        self.budget = budget
+        self.holding = False
+        self.held: List[str] = []
+        self.uploaded = True
+        self._tasks: List[asyncio.Task] = []
+
+    async def submit(self, feed_file: str, reserved: int = 0) -> None:
+        """
+        Upload a feed file, or hold it back while ``holding`` is set.
+
+        :param feed_file: Generated feed file.
+        :param reserved: Budget bytes reserved for the file's chunk; they
+            are replaced by the file size and released by the upload.
+        """
+        if self.budget:
+            reserved = await self.budget.resize(
+                reserved, 0 if self.holding else os.path.getsize(feed_file))
+        if self.holding:
+            self.held.append(feed_file)
+            return
+        await self._upload_held()
+        await self._start(feed_file, reserved)
+
+    async def finish(self) -> bool:
+        """
+        Upload the held files and wait for every upload to end.
+
+        :return: True if every upload succeeded.
+        """
+        await self._upload_held()
+        tasks, self._tasks = self._tasks, []
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            failed = isinstance(result, BaseException)
+            if failed:
+                logger.error("Feed file upload failed: %s", result)
+            self.uploaded &= not failed and bool(result)
+        return self.uploaded
+
+    async def cancel(self) -> None:
+        """
+        Cancel the uploads still running and wait for them to end, so
+        their reservations are released.
+        """
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def discard(self) -> None:
+        """
+        Remove the held files without uploading them.
+        """
+        for feed_file in self.held:
+            try:
+                os.remove(feed_file)
+            except OSError as e:
+                logger.error("Failed to delete file %s: %s", feed_file, e)
+        self.held = []
+
+    async def _upload_held(self) -> None:
+        while self.held:
+            feed_file = self.held.pop(0)
+            # Counted without waiting: the caller may hold a reservation
+            # itself, with no upload running yet to free the budget.
+            reserved = await self.budget.resize(
+                0, os.path.getsize(feed_file)) if self.budget else 0
+            await self._start(feed_file, reserved)
+
+    async def _start(self, feed_file: str, reserved: int) -> None:
+        if self.budget:
+            self._tasks.append(asyncio.create_task(
+                self._upload(feed_file, reserved)))
+        else:
+            self.uploaded &= await self._upload(feed_file, reserved)
+
+    async def _upload(self, feed_file: str, reserved: int) -> bool:
+        try:
+            uploaded = await self.storage_adapter.upload_file(
+                feed_file,
+                "application/json",
+                "gzip")
+        finally:
+            if self.budget:
+                await self.budget.release(reserved)
+        logger.info("Uploaded %s to storage.", feed_file, extra=SAMPLED)
+        return uploaded
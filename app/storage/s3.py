@@ -7,19 +7,37 @@ from botocore.exceptions import BotoCoreError, ClientError
 from config import S3_CONFIG
 from app.storage.interfaces import StorageInterface
 
-from app.utils.logger import get_logger
+from app.utils.logger import SAMPLED, get_logger
 
 logger = get_logger(__name__)
 
 
 class S3StorageAdapter(StorageInterface):
-    def __init__(self):
+    """
+    Storage adapter that uploads files to the configured S3 bucket.
+
+    Attributes:
+        keep_source (bool): Leave the source file in place after upload.
+    """
+
+    def __init__(self, keep_source=False):
+        self.keep_source = keep_source
         self.session = aioboto3.Session(
             aws_access_key_id=S3_CONFIG["access_key_id"],
             aws_secret_access_key=S3_CONFIG["secret_access_key"],
             region_name=S3_CONFIG["region"]
         )
 
+    async def download_file(self, key: str, destination_path: str) -> bool:
+        try:
+            async with self.session.client('s3') as s3_client:
+                await s3_client.download_file(
+                    S3_CONFIG["bucket_name"], key, destination_path)
+            return True
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Failed to download file %s: %s", key, e)
+            return False
+
     async def upload_file(self,
                           file_path: str,
                           content_type: str,
@@ -51,13 +69,18 @@ class S3StorageAdapter(StorageInterface):
                 logger.info(
                     "File %s uploaded successfully on attempt %s.",
                     file_path,
-                    attempt)
+                    attempt,
+                    extra=SAMPLED)
+
+                if self.keep_source:
+                    return True
 
                 # Delete the file after successful upload
                 try:
                     os.remove(file_path)
                     logger.info(
-                        "File %s deleted after successful upload.", file_path)
+                        "File %s deleted after successful upload.", file_path,
+                        extra=SAMPLED)
                 except OSError as delete_err:
                     logger.error("Failed to delete file %s: %s",
                                  file_path, delete_err)
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Coroutine
+
+from config import EVENT_LOOP
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def run(main: Coroutine[Any, Any, Any], engine: str = None) -> Any:
+    """
+    Run a coroutine to completion on the configured event loop engine.
+
+    ``"uvloop"`` falls back to the default asyncio loop, with a warning,
+    when uvloop is not installed.
+
+    :param main: Coroutine to run.
+    :param engine: ``"asyncio"`` or ``"uvloop"``; defaults to EVENT_LOOP.
+    :return: Result of the coroutine.
+    """
+    engine = engine or EVENT_LOOP
+    loop_factory = None
+
+    if engine == "uvloop":
+        try:
+            import uvloop  # pylint: disable=import-outside-toplevel
+            loop_factory = uvloop.new_event_loop
+        except ImportError:
+            logger.warning("uvloop is not installed, using asyncio.")
+    elif engine != "asyncio":
+        main.close()
+        raise ValueError(f"Unsupported event loop: {engine}")
+
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(main)
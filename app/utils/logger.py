@@ -1,20 +1,106 @@
+import atexit
+import json
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from config import LOG_MODE, LOG_FORMAT, LOG_SAMPLE_EVERY
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Pass as ``extra=SAMPLED`` on hot per-chunk log calls so that only every
+# LOG_SAMPLE_EVERY-th occurrence of the message is emitted.
+SAMPLED = {"sampled": True}
+
+_log_queue = queue.SimpleQueue()
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats log records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": self.formatTime(record),
+            "name": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through the first and then every ``every``-th occurrence of each
+    message marked with ``extra=SAMPLED``. Other records always pass.
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = every
+        self.counts = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        key = (record.name, record.msg)
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        return count % self.every == 0
+
+
+def _build_formatter() -> logging.Formatter:
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def _get_queue_handler() -> QueueHandler:
+    """
+    Return a handler that enqueues records for a shared background
+    listener, starting the listener on first use.
+    """
+    global _listener  # pylint: disable=global-statement
+    if _listener is None:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(_build_formatter())
+        _listener = QueueListener(_log_queue, stream_handler)
+        _listener.start()
+        atexit.register(stop_log_listener)
+    return QueueHandler(_log_queue)
+
+
+def stop_log_listener() -> None:
+    """
+    Flush queued records and stop the background listener, if running.
+    """
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def get_logger(name: str) -> logging.Logger:
     """
     Create and configure a logger.
 
+    With LOG_MODE=queue, records are handed to a background thread for
+    formatting and writing, so logging never blocks the event loop.
+
     :param name: Name of the logger.
     :return: Configured logger instance.
     """
     logger = logging.getLogger(name)
     if not logger.handlers:
         logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
+        if LOG_MODE == "queue":
+            handler = _get_queue_handler()
+        else:
+            handler = logging.StreamHandler()
+            handler.setFormatter(_build_formatter())
         logger.addHandler(handler)
+        if LOG_SAMPLE_EVERY > 1:
+            logger.addFilter(SamplingFilter(LOG_SAMPLE_EVERY))
     return logger
@@ -0,0 +1,174 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from config import LOOP_LAG_INTERVAL, LOOP_LAG_THRESHOLD
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Number of stall stacks kept per run; later stalls are only counted.
+MAX_STALLS = 20
+
+
+@dataclass
+class LoopStall:
+    """
+    A period during which the event loop did not run any callbacks.
+
+    Attributes:
+        blocked_seconds (float): How long the loop had been blocked when
+            the stack was captured.
+        stack (str): Formatted stack of the loop thread at that moment.
+    """
+
+    blocked_seconds: float
+    stack: str
+
+
+@dataclass
+class LoopLagReport:
+    """
+    Event-loop lag measured over a run, in seconds.
+
+    Attributes:
+        samples (int): Number of lag samples taken.
+        p50 (float): Median lag.
+        p95 (float): 95th percentile lag.
+        p99 (float): 99th percentile lag.
+        max (float): Largest lag observed.
+        stall_count (int): Number of stalls over the threshold.
+        stalls (list): Stacks of the first MAX_STALLS stalls.
+    """
+
+    samples: int = 0
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    max: float = 0.0
+    stall_count: int = 0
+    stalls: List[LoopStall] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (f"p50={self.p50 * 1000:.1f}ms p95={self.p95 * 1000:.1f}ms "
+                f"p99={self.p99 * 1000:.1f}ms max={self.max * 1000:.1f}ms "
+                f"stalls={self.stall_count}")
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LoopLagWatchdog:
+    """
+    Samples event-loop lag and captures the stack of code that blocks the
+    loop.
+
+    A task on the loop sleeps for ``interval`` and records how late it
+    woke up. A daemon thread watches the task's heartbeat; when the loop
+    has not run it for longer than ``threshold``, the thread captures the
+    loop thread's current stack, i.e. the blocking code itself rather
+    than whatever runs after it returns. Each stall is captured once.
+
+    Attributes:
+        interval (float): Seconds between lag samples.
+        threshold (float): Blocking time after which a stall is recorded.
+        lags (list): Lag of every sample so far.
+        stalls (list): Captured stalls.
+    """
+
+    def __init__(self, interval: float = None, threshold: float = None):
+        self.interval = interval or LOOP_LAG_INTERVAL
+        self.threshold = threshold or LOOP_LAG_THRESHOLD
+        self.lags: List[float] = []
+        self.stalls: List[LoopStall] = []
+        self.stall_count = 0
+        self._heartbeat = 0.0
+        self._loop_thread_id = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """
+        Start sampling the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._sampler = loop.create_task(self._sample())
+        self._watcher = threading.Thread(target=self._watch,
+                                         name="loop-lag-watchdog",
+                                         daemon=True)
+        self._watcher.start()
+
+    async def stop(self) -> LoopLagReport:
+        """
+        Stop sampling and summarise the lag observed since start().
+
+        :return: Lag percentiles and captured stalls.
+        """
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.cancel()
+            try:
+                await self._sampler
+            except asyncio.CancelledError:
+                pass
+        if self._watcher is not None:
+            await asyncio.to_thread(self._watcher.join)
+        return self.report()
+
+    def report(self) -> LoopLagReport:
+        """
+        Summarise the samples and stalls collected so far.
+
+        :return: Lag percentiles and captured stalls.
+        """
+        ordered = sorted(self.lags)
+        return LoopLagReport(samples=len(ordered),
+                             p50=_percentile(ordered, 0.50),
+                             p95=_percentile(ordered, 0.95),
+                             p99=_percentile(ordered, 0.99),
+                             max=ordered[-1] if ordered else 0.0,
+                             stall_count=self.stall_count,
+                             stalls=list(self.stalls))
+
+    async def _sample(self) -> None:
+        # perf_counter rather than loop.time(), whose resolution is only a
+        # millisecond on uvloop.
+        while True:
+            start = time.perf_counter()
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lags.append(
+                max(time.perf_counter() - start - self.interval, 0.0))
+
+    def _watch(self) -> None:
+        captured = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked <= self.threshold or heartbeat == captured:
+                continue
+            captured = heartbeat
+            self.stall_count += 1
+            if len(self.stalls) >= MAX_STALLS:
+                continue
+            frame = sys._current_frames().get(  # pylint: disable=protected-access
+                self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.stalls.append(LoopStall(blocked, stack))
+            logger.warning("Event loop blocked for %.0f ms in:\n%s",
+                           blocked * 1000, stack)
@@ -0,0 +1,81 @@
+import asyncio
+import resource
+import sys
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident set size of the process so far.
+
+    :return: Peak RSS in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    """
+    Run-wide budget for the estimated memory held by in-flight chunks.
+
+    Stages reserve an estimate before allocating and release it once the
+    memory is gone; reserve() waits while the budget is exhausted, which
+    applies backpressure to whichever stage wants more. A reservation
+    larger than the whole budget is capped at the budget, so it waits for
+    everything else to drain instead of waiting forever.
+
+    Attributes:
+        limit (int): Budget in bytes.
+        reserved (int): Bytes currently reserved.
+        peak_reserved (int): Highest number of bytes reserved at once.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.reserved = 0
+        self.peak_reserved = 0
+        self._condition = asyncio.Condition()
+
+    async def reserve(self, size: int) -> int:
+        """
+        Wait until ``size`` bytes fit in the budget and reserve them.
+
+        :param size: Estimated bytes.
+        :return: Bytes actually reserved, to be passed to release().
+        """
+        size = min(max(size, 0), self.limit)
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.reserved + size <= self.limit)
+            self._add(size)
+        return size
+
+    async def resize(self, reserved: int, size: int) -> int:
+        """
+        Replace a reservation with a better estimate, without waiting.
+        Memory that is already allocated is counted even if it overshoots
+        the budget; later reservations wait for it to be released.
+
+        :param reserved: Bytes returned by reserve() or resize().
+        :param size: New estimate in bytes.
+        :return: Bytes now reserved.
+        """
+        size = max(size, 0)
+        async with self._condition:
+            self._add(size - reserved)
+            self._condition.notify_all()
+        return size
+
+    async def release(self, reserved: int) -> None:
+        """
+        Return a reservation to the budget.
+
+        :param reserved: Bytes returned by reserve() or resize().
+        """
+        async with self._condition:
+            self._add(-reserved)
+            self._condition.notify_all()
+
+    def _add(self, size: int) -> None:
+        self.reserved += size
+        self.peak_reserved = max(self.peak_reserved, self.reserved)
@@ -0,0 +1,70 @@
+"""
+Benchmark: convergence of AdaptiveChunkSizer on synthetic workloads.
+
+Each workload models a chunk's fetch + encode time as a fixed per-query
+overhead plus a per-row cost (with +/-10% noise) and its memory as a
+per-row size. The benchmark reports how many chunks the sizer needs to
+settle within 10% of the best size for the target latency and memory
+budget.
+
+Run with: python -m benchmarks.bench_chunking
+"""
+import random
+
+from app.feed.chunking import AdaptiveChunkSizer
+
+TARGET_SECONDS = 1.0
+MEMORY_BUDGET = 64 * 1024 * 1024
+CHUNKS = 40
+
+# name, per-chunk overhead (s), per-row cost (s), bytes per row
+WORKLOADS = [
+    ("narrow rows, idle DB", 0.005, 0.00002, 600),
+    ("wide rows, idle DB", 0.005, 0.0002, 6_000),
+    ("narrow rows, loaded DB", 0.2, 0.0001, 600),
+    ("memory bound", 0.01, 0.000001, 40_000),
+]
+
+
+def optimal_size(overhead, per_row, bytes_per_row, sizer):
+    by_latency = (TARGET_SECONDS - overhead) / per_row
+    by_memory = MEMORY_BUDGET / bytes_per_row
+    return max(sizer.min_size,
+               min(sizer.max_size, int(min(by_latency, by_memory))))
+
+
+def run_workload(overhead, per_row, bytes_per_row, rng):
+    sizer = AdaptiveChunkSizer(100,
+                               min_size=10,
+                               max_size=100_000,
+                               target_seconds=TARGET_SECONDS,
+                               memory_budget=MEMORY_BUDGET)
+    for _ in range(CHUNKS):
+        rows = sizer.size
+        seconds = overhead + rows * per_row * rng.uniform(0.9, 1.1)
+        sizer.update(rows, seconds * 0.6, seconds * 0.4,
+                     rows * bytes_per_row)
+    return sizer
+
+
+def converged_after(sizes, optimum):
+    for index in range(len(sizes)):
+        if all(abs(size - optimum) <= optimum * 0.1
+               for size in sizes[index:]):
+            return index
+    return None
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'workload':<26}{'optimum':>10}{'final':>10}{'chunks':>8}")
+    for name, overhead, per_row, bytes_per_row in WORKLOADS:
+        sizer = run_workload(overhead, per_row, bytes_per_row, rng)
+        optimum = optimal_size(overhead, per_row, bytes_per_row, sizer)
+        steps = converged_after(sizer.sizes, optimum)
+        print(f"{name:<26}{optimum:>10}{sizer.size:>10}"
+              f"{'-' if steps is None else steps:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: Python-side work per chunk when PostgreSQL builds the feed
+JSON (FEED_JSON_MODE=database) against transforming rows in Python.
+
+Without TEST_POSTGRES_DSN, the rows and record texts are synthesised in
+the shape each query returns, so only the Python-side encode and
+compress cost is compared. With TEST_POSTGRES_DSN pointing at a database
+initialised with db-init.sql, both queries are also fetched and timed.
+
+Run with: python -m benchmarks.bench_db_json
+"""
+import asyncio
+import json
+import os
+import tempfile
+import timeit
+
+from app.db.queries import GET_FACILITIES_JSON_QUERY, GET_FACILITIES_QUERY
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.facilityjson_generator import FacilityJsonFeedGenerator
+
+ROWS = 20000
+REPEAT = 3
+
+
+def synthetic_rows(count):
+    return [
+        {
+            "id": i,
+            "name": f"Centre {i}",
+            "phone": f"+61-2-{i:07d}",
+            "url": f"https://centre{i}.example.com.au",
+            "latitude": -33.8 - i / 40000,
+            "longitude": 151.2 + i / 40000,
+            "country": "AU",
+            "locality": f"Suburb {i % 13}",
+            "region": "NSW",
+            "postal_code": f"{2000 + i % 900}",
+            "street_address": f"{i} George St",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+async def fetch_both(dsn):
+    import asyncpg  # pylint: disable=import-outside-toplevel
+
+    connection = await asyncpg.connect(dsn)
+    try:
+        timings = []
+        results = []
+        for query in (GET_FACILITIES_QUERY, GET_FACILITIES_JSON_QUERY):
+            start = asyncio.get_running_loop().time()
+            results.append(await connection.fetch(query, 0, ROWS))
+            timings.append(asyncio.get_running_loop().time() - start)
+        return results[0], [row["record"] for row in results[1]], timings
+    finally:
+        await connection.close()
+
+
+def best_seconds(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def main():
+    dsn = os.getenv("TEST_POSTGRES_DSN")
+    if dsn:
+        rows, texts, (rows_fetch, texts_fetch) = asyncio.run(fetch_both(dsn))
+        print(f"fetch         rows {rows_fetch * 1000:8.1f} ms, "
+              f"json {texts_fetch * 1000:8.1f} ms")
+    else:
+        plain = FacilityFeedGenerator()
+        rows = synthetic_rows(ROWS)
+        texts = [json.dumps(plain.transform_record(row)) for row in rows]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        print(f"rows: {len(rows)}")
+        for name, generator, records in (
+                ("python", FacilityFeedGenerator(), rows),
+                ("database", FacilityJsonFeedGenerator(), texts)):
+            encode = best_seconds(lambda g=generator, r=records:
+                                  g.encode_records(r))
+            generate = best_seconds(lambda g=generator, r=records:
+                                    os.remove(g.generate_feed_file(r)))
+            print(f"{name:<13} encode {encode * 1000:8.1f} ms, "
+                  f"encode + gzip {generate * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
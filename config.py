@@ -13,6 +13,9 @@ DATABASE_CONFIG = {
     "database": os.getenv("DB_NAME"),
     "host": os.getenv("DB_HOST"),
     "port": os.getenv("DB_PORT"),
+    "pool_warm_size": int(os.getenv("DB_POOL_WARM_SIZE", "1")),
+    "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+    "query_timeout": float(os.getenv("DB_QUERY_TIMEOUT", "60")),
 }
 
 # AWS S3 configuration
@@ -26,7 +29,73 @@ S3_CONFIG = {
 # Other configurations
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "100"))
 FEED_TYPE = os.getenv("FEED_TYPE", "facility")
+# "python" transforms rows in Python; "database" has PostgreSQL build the
+# feed JSON (FacilityJsonRepository + the facility_json feed type).
+FEED_JSON_MODE = os.getenv("FEED_JSON_MODE", "python")
+FEED_MAPPINGS_DIR = os.getenv("FEED_MAPPINGS_DIR", "feed_mappings")
 FEED_NAME = os.getenv("FEED_NAME", "reservewithgoogle.entity")
+# One storage type, or several separated by commas to upload to each
+STORAGE_TYPE = os.getenv("STORAGE_TYPE", "s3")
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "local_storage")
+
+# "batch" publishes a feed (or one shard of it); "merge" combines the
+# shards' partial manifests into the metadata file; "listen" publishes
+# update feeds for facilities changed since, as they are notified
+RUN_MODE = os.getenv("RUN_MODE", "batch")
+
+# Sharded runs: each task exports the ids equal to its index modulo the
+# shard count. RUN_ID is shared by the shards and the merge of one run.
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+RUN_ID = os.getenv("RUN_ID", "")
+
+# Update feeds in RUN_MODE=listen
+UPDATE_CHANNEL = os.getenv("UPDATE_CHANNEL", "facility_changes")
+UPDATE_BATCH_WINDOW = float(os.getenv("UPDATE_BATCH_WINDOW", "2.0"))
+UPDATE_MAX_BATCH_SIZE = int(os.getenv("UPDATE_MAX_BATCH_SIZE", "500"))
+
+# Local snapshot of the facility table
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "false").lower() == "true"
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "facility_snapshot.bin")
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "3600"))
+
+# Entity-level change detection
+CHANGE_DETECTION_ENABLED = os.getenv(
+    "CHANGE_DETECTION_ENABLED", "false").lower() == "true"
+CHANGE_INDEX_PATH = os.getenv("CHANGE_INDEX_PATH", "entity_hashes.idx")
+
+# Adaptive chunk sizing, starting from CHUNK_SIZE
+ADAPTIVE_CHUNKING = os.getenv("ADAPTIVE_CHUNKING", "false").lower() == "true"
+CHUNK_SIZE_MIN = int(os.getenv("CHUNK_SIZE_MIN", "10"))
+CHUNK_SIZE_MAX = int(os.getenv("CHUNK_SIZE_MAX", "10000"))
+CHUNK_TARGET_SECONDS = float(os.getenv("CHUNK_TARGET_SECONDS", "1.0"))
+CHUNK_MEMORY_BUDGET = int(os.getenv("CHUNK_MEMORY_BUDGET", "67108864"))
+
+# Memory held by in-flight chunks across the whole run, in bytes (0 = off)
+RUN_MEMORY_BUDGET = int(os.getenv("RUN_MEMORY_BUDGET", "0"))
+
+# On-disk cache of encoded feed records, keyed by raw row content
+ENCODED_CACHE_ENABLED = os.getenv(
+    "ENCODED_CACHE_ENABLED", "false").lower() == "true"
+ENCODED_CACHE_PATH = os.getenv("ENCODED_CACHE_PATH", "encoded_records.db")
+ENCODED_CACHE_MAX_ENTRIES = int(
+    os.getenv("ENCODED_CACHE_MAX_ENTRIES", "1000000"))
+
+# Event loop engine and lag watchdog
+EVENT_LOOP = os.getenv("EVENT_LOOP", "asyncio")
+LOOP_WATCHDOG_ENABLED = os.getenv(
+    "LOOP_WATCHDOG_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1"))
+
+# Logging configuration
+LOG_MODE = os.getenv("LOG_MODE", "sync")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "1"))
 
 FEED_FILE_FORMAT = "facility_feed_{timestamp}.json.gz"
 METADATA_FILE_FORMAT = "metadata.json"
+SHARD_FEED_FILE_FORMAT = \
+    "facility_feed_{index:04d}-of-{count:04d}_{timestamp}.json.gz"
+UPDATE_FEED_FILE_FORMAT = "facility_update_{timestamp}.json.gz"
+SHARD_MANIFEST_FORMAT = "metadata.shard-{index:04d}-of-{count:04d}.json"
@@ -27,4 +27,18 @@ SELECT
     'Region ' || (g % 7),
     'MZIP' || LPAD((80000 + g)::TEXT, 5, '0'),
     (200 + g) || ' Modified St'
-FROM generate_series(1, 1000) AS g;
\ No newline at end of file
+FROM generate_series(1, 1000) AS g;
+
+-- Notify listeners (RUN_MODE=listen) with the id of every changed facility
+CREATE OR REPLACE FUNCTION notify_facility_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'facility_changes',
+        (CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END)::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER facility_changed
+AFTER INSERT OR UPDATE OR DELETE ON facility
+FOR EACH ROW EXECUTE FUNCTION notify_facility_change();
@@ -1,23 +1,46 @@
 import asyncio
+import signal
+import time
+from typing import Tuple
 
-from config import DATABASE_CONFIG, CHUNK_SIZE, FEED_NAME
+from config import DATABASE_CONFIG, CHUNK_SIZE, FEED_NAME, \
+    SNAPSHOT_ENABLED, CHANGE_DETECTION_ENABLED, CHANGE_INDEX_PATH, \
+    ADAPTIVE_CHUNKING, LOOP_WATCHDOG_ENABLED, FEED_JSON_MODE, \
+    METADATA_FILE_FORMAT, RUN_MODE, SHARD_INDEX, SHARD_COUNT, RUN_ID, \
+    RUN_MEMORY_BUDGET
 
 from app.db.connection import get_db_connection
 from app.repositories.facility import FacilityRepository
+from app.repositories.facility_json import FacilityJsonRepository
+from app.repositories.sharded import ShardedFacilityRepository
+from app.repositories.snapshot import SnapshotFacilityRepository
 
+from app.feed.change_index import ChangeTracker, EntityHashIndex
+from app.feed.chunking import AdaptiveChunkSizer, estimate_records_size
 from app.feed.factory import FeedGeneratorFactory
 from app.feed.interfaces import FeedGeneratorInterface
+from app.feed.report import RunReport
+from app.feed.sharding import ShardManifestMerger, shard_feed_file_format, \
+    shard_manifest_name
+from app.feed.updates import FacilityUpdateService
 
+from app.storage.composite import CompositeStorageAdapter
+from app.storage.factory import StorageAdapterFactory
 from app.storage.interfaces import StorageInterface
-from app.storage.s3 import S3StorageAdapter
-# from app.storage.localstorage import LocalStorageAdapter
+from app.storage.pipeline import UploadPipeline
 
-from app.utils.logger import get_logger
+from app.utils import event_loop
+from app.utils.logger import SAMPLED, get_logger
+from app.utils.loop_monitor import LoopLagWatchdog
+from app.utils.memory_budget import MemoryBudget, peak_rss_bytes
 
 logger = get_logger(__name__)
 
+# Bytes per fetched row assumed until the first chunk has been measured.
+INITIAL_BYTES_PER_ROW = 2048
 
-class FacilityFeedService:
+
+class FacilityFeedService:  # pylint: disable=too-many-instance-attributes
     """
     Service class for processing and uploading facility feed data.
     This class is responsible for fetching facility data from the database,
@@ -33,9 +56,19 @@ class FacilityFeedService:
         feed_generator (FeedGeneratorInterface): Feed generator instance for
             creating feed files.
 
+    When change detection is enabled, every encoded record is compared
+    against a persisted per-entity hash index during the publish, and
+    nothing is uploaded if nothing was added, changed or deleted. With
+    adaptive chunking, each chunk's fetch and encode latency and size
+    drive the size of the next one. The loop-lag watchdog records lag
+    percentiles for the run and the stacks of code that stalls the loop.
+    A run memory budget bounds the chunks held in memory at once and
+    lets feed file uploads overlap the following chunks.
+
     Methods:
         run(): Main method to execute the feed processing and upload
             process.
+        publish(report): Generate and upload feed and metadata files.
     """
 
     def __init__(self,
@@ -46,67 +79,287 @@ class FacilityFeedService:
         self.storage_adapter = storage_adapter
         self.feed_generator = feed_generator
         self.chunk_size = CHUNK_SIZE
+        self.change_detection = CHANGE_DETECTION_ENABLED
+        self.change_index_path = CHANGE_INDEX_PATH
+        self.adaptive_chunking = ADAPTIVE_CHUNKING
+        self.loop_watchdog = LOOP_WATCHDOG_ENABLED
+        self.metadata_filename = METADATA_FILE_FORMAT
+        self.memory_budget = RUN_MEMORY_BUDGET
+        self.run_id = None
+
+    async def run(self) -> RunReport:
+        report = RunReport()
+        watchdog = LoopLagWatchdog() if self.loop_watchdog else None
+        if watchdog:
+            watchdog.start()
+
+        try:
+            await self._run(report)
+        finally:
+            if watchdog:
+                report.loop_lag = await watchdog.stop()
+                logger.info("Event loop lag: %s", report.loop_lag.summary())
+            report.peak_rss_bytes = peak_rss_bytes()
+            logger.info("Peak RSS: %d bytes.", report.peak_rss_bytes)
+        return report
+
+    async def _run(self, report: RunReport) -> None:
+        tracker = None
+        if self.change_detection:
+            tracker = ChangeTracker(
+                EntityHashIndex.load(self.change_index_path))
+
+        await self.publish(report, tracker)
+
+        if tracker and report.published:
+            tracker.index().save(self.change_index_path)
+
+    async def publish(self,
+                      report: RunReport,
+                      tracker: ChangeTracker = None) -> None:
+        """
+        Generate and upload the feed files and the metadata file.
+
+        With a change tracker, every encoded record is hashed in the same
+        pass and compared against the index of the last published feed.
+        Feed files are kept back until a record turns out to be added or
+        changed; if the run ends without any added, changed or deleted
+        entity, they are removed and nothing is uploaded.
+
+        With a run memory budget, each chunk reserves its estimated size
+        before it is fetched: rows per chunk times the bytes per row seen
+        so far, then the measured size of the fetched rows, then the size
+        of the encoded file, which stays reserved until its upload ends.
+        Uploads then overlap the next chunks, and a fetch waits while the
+        chunks still in flight fill the budget.
+
+        :param report: Run report to fill in.
+        :param tracker: Change tracker, when change detection is enabled.
+        """
+        budget = MemoryBudget(self.memory_budget) \
+            if self.memory_budget else None
+        pipeline = UploadPipeline(self.storage_adapter, budget)
+
+        try:
+            await self._publish_chunks(report, tracker, pipeline)
+        except BaseException:
+            # Do not leave uploads running, or their reservations held.
+            await pipeline.cancel()
+            raise
+
+        if tracker and not self._report_changes(report, tracker):
+            pipeline.discard()
+            report.feed_files.clear()
+            logger.info("No facilities changed, skipping publish.")
+            return
+
+        report.published = await pipeline.finish()
+        if budget:
+            report.peak_reserved_bytes = budget.peak_reserved
+            logger.info("Peak reserved chunk memory: %d of %d bytes.",
+                        budget.peak_reserved, budget.limit)
+
+        report.published &= await self._upload_metadata_file(
+            report.feed_files)
+        logger.info("Chunk sizes: %s", report.chunk_sizes)
+        logger.info("Feed processing and upload completed.")
 
-    async def run(self):
-        feed_files = []
+    async def _publish_chunks(self,
+                              report: RunReport,
+                              tracker: ChangeTracker,
+                              pipeline: UploadPipeline) -> None:
         offset = 0
+        chunk_size = self.chunk_size
+        sizer = AdaptiveChunkSizer(chunk_size) \
+            if self.adaptive_chunking else None
+        budget = pipeline.budget
+        bytes_per_row = INITIAL_BYTES_PER_ROW
 
         while True:
-            records = await self.repository.fetch_facilities_chunk(
-                offset,
-                self.chunk_size)
-            logger.info("Fetched %d records from the database.", len(records))
+            report.chunk_sizes.append(chunk_size)
+            reserved = await budget.reserve(chunk_size * bytes_per_row) \
+                if budget else 0
+            records, fetch_seconds = await self._fetch_chunk(offset,
+                                                             chunk_size)
 
             if not records:
+                if budget:
+                    await budget.release(reserved)
                 logger.info("No more records to process.")
                 break
 
-            feed_file = self.feed_generator.generate_feed_file(records)
+            records_size = estimate_records_size(records) \
+                if budget or sizer else 0
+            if budget:
+                bytes_per_row = max(records_size // len(records), 1)
+                reserved = await budget.resize(reserved, records_size)
+
+            feed_file, encode_seconds = self._generate_feed_file(records,
+                                                                 tracker)
 
             if not feed_file:
+                if budget:
+                    await budget.release(reserved)
                 logger.error(
                     "Failed to generate feed file for offset %d.", offset)
+                pipeline.uploaded = False
                 break
 
-            feed_files.append(feed_file)
-            logger.info("Generated feed file: %s", feed_file)
+            report.feed_files.append(feed_file)
+            report.records += len(records)
+            logger.info("Generated feed file: %s", feed_file, extra=SAMPLED)
 
-            await self.storage_adapter.upload_file(
-                feed_file,
-                "application/json",
-                "gzip")
-            logger.info("Uploaded %s to storage.", feed_file)
+            offset += len(records)
+            if sizer:
+                chunk_size = sizer.update(
+                    len(records),
+                    fetch_seconds,
+                    encode_seconds,
+                    records_size)
+            # submit() only counts the file from here on, so the rows must
+            # not outlive it into the next chunk's fetch.
+            del records
 
-            offset += self.chunk_size
+            # Until a record is added or changed, the run may publish
+            # nothing at all.
+            pipeline.holding = bool(tracker) \
+                and not tracker.report.has_changes
+            await pipeline.submit(feed_file, reserved)
 
+    async def _upload_metadata_file(self, feed_files: list) -> bool:
         metadata_file = self.feed_generator.generate_metadata_file(
             feed_files,
-            FEED_NAME)
-        await self.storage_adapter.upload_file(
+            FEED_NAME,
+            filename=self.metadata_filename,
+            run_id=self.run_id)
+        uploaded = await self.storage_adapter.upload_file(
             metadata_file,
             "application/json",
             "identity")
         logger.info("Uploaded metadata file: %s to storage.", metadata_file)
-        logger.info("Feed processing and upload completed.")
+        return uploaded
+
+    async def _fetch_chunk(self,
+                           offset: int,
+                           chunk_size: int) -> Tuple[list, float]:
+        fetch_start = time.perf_counter()
+        records = await self.repository.fetch_facilities_chunk(
+            offset,
+            chunk_size)
+        fetch_seconds = time.perf_counter() - fetch_start
+        logger.info("Fetched %d records from the database in %.1f ms.",
+                    len(records),
+                    fetch_seconds * 1000,
+                    extra=SAMPLED)
+        return records, fetch_seconds
+
+    def _generate_feed_file(self,
+                            records: list,
+                            tracker: ChangeTracker = None
+                            ) -> Tuple[str, float]:
+        encode_start = time.perf_counter()
+        if tracker:
+            fragments = self.feed_generator.encode_records(records)
+            tracker.observe(self.feed_generator.entity_ids(records),
+                            fragments)
+            feed_file = self.feed_generator.write_feed_file(fragments)
+        else:
+            feed_file = self.feed_generator.generate_feed_file(records)
+        return feed_file, time.perf_counter() - encode_start
+
+    @staticmethod
+    def _report_changes(report: RunReport, tracker: ChangeTracker) -> bool:
+        report.changes = tracker.finish()
+        logger.info("Changes since the last feed: %d added, "
+                    "%d changed, %d deleted.",
+                    report.changes.added,
+                    report.changes.changed,
+                    report.changes.deleted)
+        return report.changes.has_changes
 
 
 if __name__ == "__main__":
+    async def listen():
+        # Publish update feeds for notified changes until SIGTERM/SIGINT
+        db_conn_instance = get_db_connection(DATABASE_CONFIG)
+        await db_conn_instance.connect()
+        feed_generator = FeedGeneratorFactory.get_feed_generator()
+        service = FacilityUpdateService(
+            db_conn_instance,
+            FacilityRepository(db_conn_instance),
+            StorageAdapterFactory.get_storage_adapter(),
+            feed_generator)
+
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, service.stop)
+        try:
+            await service.run()
+        finally:
+            feed_generator.close()
+            await db_conn_instance.disconnect()
+
+    async def merge():
+        # Combine the shards' partial manifests into the metadata file
+        merger = ShardManifestMerger(
+            StorageAdapterFactory.get_storage_adapter())
+        if not await merger.merge():
+            raise SystemExit("Shard manifests could not be merged.")
+
     async def main():
+        if SHARD_COUNT > 1 and FEED_JSON_MODE == "database":
+            raise ValueError("Sharded runs require FEED_JSON_MODE=python.")
+        if SHARD_COUNT > 1 and not RUN_ID:
+            raise ValueError("Sharded runs require RUN_ID.")
+        if SHARD_COUNT > 1 and CHANGE_DETECTION_ENABLED:
+            # An unchanged shard would upload no manifest for the run id,
+            # and the merge would never publish.
+            raise ValueError(
+                "Sharded runs require CHANGE_DETECTION_ENABLED=false.")
+
         # Initialize database connection and repository
         db_conn_instance = get_db_connection(DATABASE_CONFIG)
         await db_conn_instance.connect()
-        repository = FacilityRepository(db_conn_instance)
+        feed_type = None
+        if FEED_JSON_MODE == "database":
+            repository = FacilityJsonRepository(db_conn_instance)
+            feed_type = "facility_json"
+        elif SHARD_COUNT > 1:
+            repository = ShardedFacilityRepository(db_conn_instance)
+        elif SNAPSHOT_ENABLED:
+            repository = SnapshotFacilityRepository(db_conn_instance)
+        else:
+            repository = FacilityRepository(db_conn_instance)
+        await db_conn_instance.warm_up()
 
         # Initialize feed generator and storage adapter
-        feed_generator = FeedGeneratorFactory.get_feed_generator()
-        storage_adapter = S3StorageAdapter()
+        feed_generator = FeedGeneratorFactory.get_feed_generator(feed_type)
+        storage_adapter = StorageAdapterFactory.get_storage_adapter()
 
         # Initialize and run the service
         service = FacilityFeedService(
             repository,
             storage_adapter,
             feed_generator)
+        if SHARD_COUNT > 1:
+            # Shard-specific names keep concurrent shards from colliding
+            feed_generator.filename_format = shard_feed_file_format(
+                SHARD_INDEX, SHARD_COUNT)
+            service.metadata_filename = shard_manifest_name(
+                SHARD_INDEX, SHARD_COUNT)
+            service.run_id = RUN_ID
 
-        await service.run()
+        try:
+            await service.run()
+        finally:
+            feed_generator.close()
+        logger.info("Query metrics: %s",
+                    db_conn_instance.metrics.summary())
+        if isinstance(storage_adapter, CompositeStorageAdapter):
+            logger.info("Upload timings per destination: %s",
+                        storage_adapter.summary())
 
-    asyncio.run(main())
+    RUN_MODES = {"batch": main, "merge": merge, "listen": listen}
+    if RUN_MODE not in RUN_MODES:
+        raise SystemExit(f"Unsupported run mode: {RUN_MODE}")
+    event_loop.run(RUN_MODES[RUN_MODE]())
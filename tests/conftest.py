@@ -0,0 +1,39 @@
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+
+def make_facility_rows(count: int,
+                       name: str = "Facility") -> List[Dict[str, Any]]:
+    """
+    Build facility rows as the chunk query returns them, ids 1..count.
+
+    Every third row has no phone and every street address is non-ASCII,
+    so nulls and escaping are exercised wherever the rows are used.
+
+    :param count: Number of rows.
+    :param name: Prefix of each facility name.
+    :return: Facility rows ordered by id.
+    """
+    return [
+        {
+            "id": i,
+            "name": f"{name} {i}",
+            "phone": None if i % 3 == 0 else f"+1-800-{i:04d}",
+            "url": f"https://facility{i}.example.com",
+            "latitude": 40.0 + i / 1000,
+            "longitude": -75.0 - i / 1000,
+            "country": "CA",
+            "locality": f"City {i % 15}",
+            "region": f"Region {i % 7}",
+            "postal_code": f"MZIP{80000 + i}",
+            "street_address": f"{200 + i} Straße",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.fixture(name="facility_rows")
+def fixture_facility_rows() -> Callable[..., List[Dict[str, Any]]]:
+    """Factory for facility rows, see make_facility_rows."""
+    return make_facility_rows
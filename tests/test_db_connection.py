@@ -1,9 +1,14 @@
-from unittest.mock import AsyncMock, patch
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.db.connection import BaseDBConnection, \
-    PostgresDBConnection, MySQLDBConnection, get_db_connection
+from app.db.connection import DB_ENGINES, BaseDBConnection, \
+    PostgresDBConnection, MySQLDBConnection, get_db_connection, \
+    register_db_engine
 
 
 @pytest.mark.asyncio
@@ -83,3 +88,259 @@ def test_get_db_connection_invalid():
     config = {"engine": "sqlite"}
     with pytest.raises(ValueError):
         get_db_connection(config)
+
+
+def test_register_db_engine():
+    class DummyDBConnection(BaseDBConnection):  # pylint: disable=abstract-method
+        def __init__(self, config):
+            super().__init__()
+            self.config = config
+
+    register_db_engine("dummy", DummyDBConnection)
+    try:
+        db_instance = get_db_connection({"engine": "dummy"})
+        assert isinstance(db_instance, DummyDBConnection)
+    finally:
+        DB_ENGINES.pop("dummy")
+
+
+def _postgres_config():
+    return {
+        'user': 'user',
+        'password': 'pass',
+        'host': 'localhost',
+        'port': '5432',
+        'database': 'testdb',
+        'query_timeout': 5.0
+    }
+
+
+def _mock_pg_connection(pid):
+    conn = MagicMock()
+    conn.get_server_pid.return_value = pid
+    conn.fetch = AsyncMock(return_value=[{"id": 1}])
+    # pylint: disable=protected-access
+    conn._prepare = AsyncMock()
+    return conn
+
+
+def _mock_pool(conn):
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    return pool
+
+
+class _FakePgConnection:
+    """
+    Pooled asyncpg connection stand-in. Like asyncpg's, the statement
+    cache outlives a release but PreparedStatement objects do not.
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.release_ctr = 0
+        self.cache = set()
+        self.prepares = 0
+
+    def get_server_pid(self):
+        return self.pid
+
+    async def prepare(self, query):
+        return await self._prepare(query)
+
+    async def _prepare(self, query, use_cache=False):
+        self.prepares += 1
+        if use_cache:
+            self.cache.add(query)
+        return SimpleNamespace(
+            fetch=partial(self._fetch_prepared, self.release_ctr))
+
+    async def fetch(self, query, *params, timeout=None):
+        if query not in self.cache:
+            self.prepares += 1
+        return [{"params": params, "timeout": timeout}]
+
+    async def _fetch_prepared(self, release_ctr, *params, timeout=None):
+        if release_ctr != self.release_ctr:
+            raise RuntimeError("connection released back to the pool")
+        return [{"params": params, "timeout": timeout}]
+
+
+@pytest.mark.asyncio
+async def test_base_execute_prepared_falls_back_to_execute_query():
+    db = BaseDBConnection()
+    db.execute_query = AsyncMock(return_value=[(1,)])
+    db.prepare_statement("one", "SELECT 1")
+
+    assert await db.execute_prepared("one") == [(1,)]
+    db.execute_query.assert_called_once_with("SELECT 1")
+    assert db.metrics.statements["one"].executions == 1
+
+
+@pytest.mark.asyncio
+async def test_postgres_prepared_statement_cached_per_connection():
+    conn = _mock_pg_connection(pid=42)
+    db = PostgresDBConnection(_postgres_config())
+    db.pool = _mock_pool(conn)
+    db.prepare_statement("chunk", "SELECT $1::int")
+
+    await db.execute_prepared("chunk", 1)
+    await db.execute_prepared("chunk", 2)
+
+    # pylint: disable=protected-access
+    conn._prepare.assert_called_once_with("SELECT $1::int", use_cache=True)
+    conn.fetch.assert_called_with("SELECT $1::int", 2, timeout=5.0)
+    metrics = db.metrics.statements["chunk"]
+    assert metrics.prepares == 1
+    assert metrics.executions == 2
+
+
+@pytest.mark.asyncio
+async def test_postgres_prepared_statement_timeout_override():
+    conn = _mock_pg_connection(pid=42)
+    db = PostgresDBConnection(_postgres_config())
+    db.pool = _mock_pool(conn)
+    db.prepare_statement("chunk", "SELECT 1", timeout=0.5)
+
+    await db.execute_prepared("chunk")
+
+    conn.fetch.assert_called_once_with("SELECT 1", timeout=0.5)
+
+
+@pytest.mark.asyncio
+async def test_postgres_prepared_statement_survives_release():
+    conn = _FakePgConnection(pid=42)
+
+    @asynccontextmanager
+    async def acquire():
+        try:
+            yield conn
+        finally:
+            conn.release_ctr += 1
+
+    db = PostgresDBConnection(_postgres_config())
+    db.pool = MagicMock(acquire=acquire)
+    db.prepare_statement("chunk", "SELECT $1::int")
+
+    first = await db.execute_prepared("chunk", 1)
+    second = await db.execute_prepared("chunk", 2)
+
+    assert first[0]["params"] == (1,)
+    assert second[0]["params"] == (2,)
+    assert conn.prepares == 1
+
+
+@pytest.mark.asyncio
+async def test_postgres_warm_up_prepares_on_each_connection():
+    connections = [_mock_pg_connection(pid) for pid in (1, 2, 3)]
+    db = PostgresDBConnection(_postgres_config())
+    db.pool = MagicMock()
+    db.pool.acquire = AsyncMock(side_effect=connections)
+    db.pool.release = AsyncMock()
+    db.prepare_statement("chunk", "SELECT 1")
+
+    await db.warm_up(3)
+
+    for conn in connections:
+        # pylint: disable=protected-access
+        conn._prepare.assert_called_once_with("SELECT 1", use_cache=True)
+    assert db.pool.release.call_count == 3
+    assert db.metrics.statements["chunk"].prepares == 3
+
+
+def test_statement_metrics_saved_latency():
+    db = BaseDBConnection()
+    db.metrics.record_prepare("chunk", 0.004)
+    for _ in range(4):
+        db.metrics.record_execute("chunk", 0.001)
+
+    summary = db.metrics.summary()["chunk"]
+    assert summary["executions"] == 4
+    assert summary["saved_ms_per_execution"] == pytest.approx(3.0)
+
+
+def _listen_conn():
+    conn = MagicMock()
+    conn.add_listener = AsyncMock()
+    conn.remove_listener = AsyncMock()
+    return conn
+
+
+def _listen_db(*acquired):
+    db = PostgresDBConnection(_postgres_config())
+    db.pool = MagicMock()
+    db.pool.acquire = AsyncMock(side_effect=acquired)
+    db.pool.release = AsyncMock()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_postgres_listen_holds_one_connection():
+    conn = _listen_conn()
+    db = _listen_db(conn)
+    payloads = []
+
+    await db.listen("changes", payloads.append)
+    await db.listen("other", payloads.append)
+    listener = conn.add_listener.call_args_list[0].args[1]
+    listener(conn, 123, "changes", "7")
+    await db.unlisten("changes")
+    db.pool.release.assert_not_called()
+    await db.unlisten("other")
+
+    assert payloads == ["7"]
+    db.pool.acquire.assert_called_once()
+    db.pool.release.assert_called_once_with(conn)
+
+
+@pytest.mark.asyncio
+async def test_postgres_listen_survives_lost_connection():
+    lost, replacement = _listen_conn(), _listen_conn()
+    db = _listen_db(lost, replacement)
+    await db.listen("changes", print)
+    await db.listen("other", print)
+
+    on_terminated = lost.add_termination_listener.call_args.args[0]
+    on_terminated(lost)
+    await asyncio.sleep(0)
+
+    db.pool.release.assert_called_once_with(lost)
+    assert [call.args[0] for call in
+            replacement.add_listener.call_args_list] == ["changes", "other"]
+    await db.unlisten("changes")
+    replacement.remove_listener.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch("app.db.connection.asyncio.sleep", new_callable=AsyncMock)
+async def test_postgres_listen_reports_unrecoverable_loss(_sleep):
+    lost = _listen_conn()
+    db = _listen_db(lost, *[OSError("refused")] * 3)
+    errors = []
+    await db.listen("changes", print, errors.append)
+
+    on_terminated = lost.add_termination_listener.call_args.args[0]
+    on_terminated(lost)
+    # pylint: disable=protected-access
+    await asyncio.wait_for(db._relisten_task, 1)
+
+    assert len(errors) == 1
+    assert isinstance(errors[0], OSError)
+
+
+@pytest.mark.asyncio
+async def test_postgres_unlisten_ignores_later_close():
+    conn = _listen_conn()
+    db = _listen_db(conn)
+    await db.listen("changes", print)
+    on_terminated = conn.add_termination_listener.call_args.args[0]
+
+    await db.unlisten("changes")
+    conn.remove_termination_listener.assert_called_once_with(on_terminated)
+    on_terminated(conn)
+
+    # pylint: disable=protected-access
+    assert db._relisten_task is None
+    db.pool.acquire.assert_called_once()
+    db.pool.release.assert_called_once_with(conn)
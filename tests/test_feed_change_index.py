@@ -0,0 +1,79 @@
+from array import array
+
+import pytest
+
+from app.feed.change_index import ChangeTracker, EntityHashIndex, hash_record
+
+
+def _record(entity_id, name="Facility"):
+    return f'{{"entity_id": {entity_id}, "name": "{name}"}}'.encode()
+
+
+def _observe(tracker, *records):
+    tracker.observe([record[0] for record in records],
+                    [_record(*record) for record in records])
+
+
+def test_hash_record_is_stable_and_content_sensitive():
+    assert hash_record(_record(1)) == hash_record(_record(1))
+    assert hash_record(_record(1)) != hash_record(_record(1, "Other"))
+    assert 0 <= hash_record(_record(1)) < 2 ** 64
+
+
+def test_index_round_trip(tmp_path):
+    path = str(tmp_path / "index.idx")
+    index = EntityHashIndex(array("q", [1, 5, 9]),
+                            array("Q", [2 ** 64 - 1, 7, 3]))
+    index.save(path)
+
+    loaded = EntityHashIndex.load(path)
+    assert len(loaded) == 3
+    assert loaded.get(1) == 2 ** 64 - 1
+    assert loaded.get(9) == 3
+    assert loaded.get(4) is None
+
+
+def test_index_load_missing_file(tmp_path):
+    assert len(EntityHashIndex.load(str(tmp_path / "missing.idx"))) == 0
+
+
+def test_index_load_rejects_foreign_file(tmp_path):
+    path = tmp_path / "index.idx"
+    path.write_bytes(b"x" * 32)
+
+    with pytest.raises(ValueError):
+        EntityHashIndex.load(str(path))
+
+
+def test_change_tracker_counts_changes():
+    previous_tracker = ChangeTracker(EntityHashIndex())
+    _observe(previous_tracker, (1,), (2,), (3,))
+    previous = previous_tracker.index()
+
+    tracker = ChangeTracker(previous)
+    _observe(tracker, (1,), (2, "Renamed"))
+    _observe(tracker, (4,))
+    report = tracker.finish()
+
+    assert (report.added, report.changed, report.deleted,
+            report.unchanged) == (1, 1, 1, 1)
+    assert report.has_changes
+
+
+def test_change_tracker_no_changes():
+    previous_tracker = ChangeTracker(EntityHashIndex())
+    _observe(previous_tracker, (1,), (2,))
+
+    tracker = ChangeTracker(previous_tracker.index())
+    _observe(tracker, (1,), (2,))
+
+    assert not tracker.finish().has_changes
+
+
+def test_change_tracker_index_is_sorted():
+    tracker = ChangeTracker(EntityHashIndex())
+    _observe(tracker, (3,), (1,), (2,))
+
+    index = tracker.index()
+    assert list(index.ids) == [1, 2, 3]
+    assert index.get(3) == hash_record(_record(3))
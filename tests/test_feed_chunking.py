@@ -0,0 +1,71 @@
+import sys
+
+from app.feed.chunking import AdaptiveChunkSizer, estimate_records_size
+
+
+def _sizer(**kwargs):
+    options = {"min_size": 10, "max_size": 100_000,
+               "target_seconds": 1.0, "memory_budget": 10_000_000}
+    options.update(kwargs)
+    return AdaptiveChunkSizer(100, **options)
+
+
+def test_sizer_grows_at_most_twofold_per_chunk():
+    sizer = _sizer()
+
+    assert sizer.update(100, 0.001, 0.001, 1000) == 200
+
+
+def test_sizer_shrinks_slow_chunks():
+    sizer = _sizer()
+
+    assert sizer.update(100, 3.0, 1.0, 1000) == 50
+
+
+def test_sizer_respects_bounds():
+    sizer = _sizer(max_size=150)
+    assert sizer.update(100, 0.001, 0.001, 1000) == 150
+
+    sizer = _sizer(min_size=80)
+    assert sizer.update(100, 30.0, 0.0, 1000) == 80
+
+
+def test_sizer_ignores_empty_chunks():
+    sizer = _sizer()
+
+    assert sizer.update(0, 1.0, 0.0, 0) == 100
+    assert sizer.sizes == [100]
+
+
+def test_sizer_converges_to_target_latency():
+    sizer = _sizer()
+    # 50ms per query plus 0.2ms per row: 4750 rows take 1s.
+    for _ in range(30):
+        rows = sizer.size
+        sizer.update(rows, 0.05 + rows * 0.0001, rows * 0.0001, rows * 100)
+
+    assert abs(sizer.size - 4750) < 4750 * 0.05
+
+
+def test_sizer_converges_to_memory_budget():
+    sizer = _sizer(memory_budget=1_000_000)
+    for _ in range(30):
+        rows = sizer.size
+        sizer.update(rows, rows * 0.000001, 0.0, rows * 2000)
+
+    assert sizer.size == 500
+
+
+def test_estimate_records_size_scales_with_rows():
+    records = [{"id": i, "name": "Facility"} for i in range(100)]
+
+    one = estimate_records_size(records[:1])
+    assert one > 0
+    assert estimate_records_size(records) == one * 100
+    assert estimate_records_size([]) == 0
+
+
+def test_estimate_records_size_of_record_texts():
+    texts = ['{"entity_id": 1, "name": "Facility"}'] * 20
+
+    assert estimate_records_size(texts) == 20 * sys.getsizeof(texts[0])
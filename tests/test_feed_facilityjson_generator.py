@@ -0,0 +1,36 @@
+import gzip
+import json
+
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.facilityjson_generator import FacilityJsonFeedGenerator
+
+
+def _as_postgres_text(record):
+    # GET_FACILITIES_JSON_QUERY keeps non-ASCII text as UTF-8.
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _read_feed(path):
+    with gzip.open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def test_feed_matches_facility_feed_generator(tmp_path, monkeypatch,
+                                              facility_rows):
+    monkeypatch.chdir(tmp_path)
+    rows = facility_rows(5, 'Clinic "quoted" é')
+    plain = FacilityFeedGenerator()
+    texts = [_as_postgres_text(plain.transform_record(row)) for row in rows]
+
+    expected = _read_feed(plain.generate_feed_file(rows, 1))
+    actual = _read_feed(
+        FacilityJsonFeedGenerator().generate_feed_file(texts, 2))
+
+    assert actual == expected
+
+
+def test_transform_record_parses_text():
+    record = {"entity_id": 1, "location": {"latitude": 1.5}}
+
+    assert FacilityJsonFeedGenerator().transform_record(
+        _as_postgres_text(record)) == record
@@ -1,7 +1,20 @@
+import json
+
 import pytest
 
+from app.feed import factory
 from app.feed.factory import FeedGeneratorFactory
 from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.mappedfeed_generator import MappedFeedGenerator
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    # Feed types registered by a test must not leak into other tests.
+    # pylint: disable=protected-access
+    monkeypatch.setattr(FeedGeneratorFactory, "_builders",
+                        dict(FeedGeneratorFactory._builders))
+    monkeypatch.setattr(FeedGeneratorFactory, "_mappings_loaded", False)
 
 
 def test_get_feed_generator():
@@ -12,3 +25,34 @@ def test_get_feed_generator():
 def test_get_feed_generator_invalid():
     with pytest.raises(ValueError):
         FeedGeneratorFactory.get_feed_generator("invalid_feed_type")
+
+
+def test_get_feed_generator_from_mapping_file(tmp_path):
+    (tmp_path / "compact.json").write_text(
+        json.dumps({"name": "compact", "fields": {"entity_id": "id"}}))
+    FeedGeneratorFactory.load_mappings(str(tmp_path))
+
+    generator = FeedGeneratorFactory.get_feed_generator("compact")
+
+    assert isinstance(generator, MappedFeedGenerator)
+    assert generator.transform_record({"id": 3}) == {"entity_id": 3}
+
+
+def test_register_feed_type():
+    FeedGeneratorFactory.register_feed_type("custom", FacilityFeedGenerator)
+
+    assert isinstance(FeedGeneratorFactory.get_feed_generator("custom"),
+                      FacilityFeedGenerator)
+
+
+def test_bad_mapping_file_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(factory, "FEED_MAPPINGS_DIR", str(tmp_path))
+    mapping_file = tmp_path / "compact.json"
+    mapping_file.write_text("{not json")
+
+    with pytest.raises(ValueError):
+        FeedGeneratorFactory.get_feed_generator("facility")
+
+    mapping_file.write_text(json.dumps({"fields": {"entity_id": "id"}}))
+    assert isinstance(FeedGeneratorFactory.get_feed_generator("compact"),
+                      MappedFeedGenerator)
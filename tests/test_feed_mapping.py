@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.mappedfeed_generator import MappedFeedGenerator
+from app.feed.mapping import FACILITY_MAPPING, FeedMapping
+
+ROW = {
+    "id": 7,
+    "name": "Harbour Clinic",
+    "phone": "555-0107",
+    "url": "https://harbour.example.org",
+    "latitude": 12.5,
+    "longitude": -3.25,
+    "country": "NZ",
+    "locality": "Port",
+    "region": "Bay",
+    "postal_code": "0107",
+    "street_address": "7 Quay Rd",
+}
+
+
+def test_compiled_mapping_matches_hand_written_transform():
+    transform = FACILITY_MAPPING.compile()
+
+    assert transform(ROW) == FacilityFeedGenerator().transform_record(ROW)
+
+
+def test_compile_rejects_non_column_leaves():
+    with pytest.raises(ValueError):
+        FeedMapping("broken", {"entity_id": 1}).compile()
+
+
+def test_compile_quotes_names():
+    transform = FeedMapping("quoted", {"it's": "a\"b"}).compile()
+
+    assert transform({"a\"b": 1}) == {"it's": 1}
+
+
+def test_version_follows_content():
+    copy = FeedMapping(FACILITY_MAPPING.name, dict(FACILITY_MAPPING.fields))
+
+    assert copy.version == FACILITY_MAPPING.version
+    assert copy.version != FeedMapping("facility", {"id": "id"}).version
+
+
+def test_load_json_defaults_name_to_file_name(tmp_path):
+    path = tmp_path / "compact.json"
+    path.write_text(json.dumps({"fields": {"entity_id": "id"}}))
+
+    mapping = FeedMapping.load(str(path))
+
+    assert mapping.name == "compact"
+    assert mapping.compile()(ROW) == {"entity_id": 7}
+
+
+def test_load_yaml(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "compact.yaml"
+    path.write_text("name: compact_yaml\n"
+                    "fields:\n"
+                    "  entity_id: id\n"
+                    "  location:\n"
+                    "    latitude: latitude\n")
+
+    mapping = FeedMapping.load(str(path))
+
+    assert mapping.name == "compact_yaml"
+    assert mapping.compile()(ROW) == {"entity_id": 7,
+                                      "location": {"latitude": 12.5}}
+
+
+def test_mapped_generator_writes_same_feed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mapped = MappedFeedGenerator(FACILITY_MAPPING)
+
+    assert mapped.encode_records([ROW]) == \
+        FacilityFeedGenerator().encode_records([ROW])
+    assert mapped.mapping_version != FacilityFeedGenerator.mapping_version
@@ -0,0 +1,113 @@
+import gzip
+import json
+from unittest.mock import patch
+
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.record_cache import EncodedRecordCache
+
+
+def test_key_for_depends_on_content(facility_rows):
+    first, second = facility_rows(2)
+
+    assert EncodedRecordCache.key_for(first) == \
+        EncodedRecordCache.key_for(dict(first))
+    assert EncodedRecordCache.key_for(first) != \
+        EncodedRecordCache.key_for(second)
+    assert EncodedRecordCache.keys_for([first, second]) == \
+        [EncodedRecordCache.key_for(first),
+         EncodedRecordCache.key_for(second)]
+
+
+def test_key_for_depends_on_column_names():
+    assert EncodedRecordCache.key_for({"a": 1, "b": 2}) != \
+        EncodedRecordCache.key_for({"a": 1, "c": 2})
+
+
+def test_get_many_returns_stored_entries(tmp_path):
+    cache = EncodedRecordCache(str(tmp_path / "cache.db"), "v1", 10)
+    cache.put_many({1: b"one", 2: b"two"})
+
+    assert cache.get_many([1, 2, 3]) == {1: b"one", 2: b"two"}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_put_many_evicts_least_recently_used(tmp_path):
+    cache = EncodedRecordCache(str(tmp_path / "cache.db"), "v1", 3)
+    cache.get_many([1, 2])
+    cache.put_many({1: b"one", 2: b"two"})
+    cache.get_many([3])
+    cache.put_many({3: b"three"})
+    # Touch 1 so that 2 is the least recently used entry.
+    cache.get_many([1])
+    cache.put_many({4: b"four"})
+
+    # Compaction keeps the two most recently used entries.
+    assert sorted(cache.get_many([1, 2, 3, 4])) == [1, 4]
+    assert len(cache) == 2
+
+
+def test_mapping_version_change_clears_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EncodedRecordCache(path, "v1", 10)
+    cache.put_many({1: b"one"})
+    cache.close()
+
+    cache = EncodedRecordCache(path, "v1", 10)
+    assert cache.get_many([1]) == {1: b"one"}
+    cache.close()
+    cache = EncodedRecordCache(path, "v2", 10)
+    assert not cache.get_many([1])
+    cache.close()
+
+
+def test_unsaved_entries_are_dropped_on_reopen(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EncodedRecordCache(path, "v1", 10)
+    cache.put_many({1: b"one"})
+    cache.close()
+    cache = EncodedRecordCache(path, "v1", 10)
+    cache.put_many({2: b"two"})
+    # Simulate a crash: the index is not written back.
+    cache._data.close()  # pylint: disable=protected-access
+
+    cache = EncodedRecordCache(path, "v1", 10)
+    assert cache.get_many([1, 2]) == {1: b"one"}
+    cache.close()
+
+
+def test_cached_output_matches_json_dump(tmp_path, monkeypatch, facility_rows):
+    monkeypatch.chdir(tmp_path)
+    rows = facility_rows(20)
+    cache = EncodedRecordCache(str(tmp_path / "cache.db"),
+                               FacilityFeedGenerator.mapping_version, 100)
+    plain = FacilityFeedGenerator()
+    cached = FacilityFeedGenerator(cache)
+
+    cached.generate_feed_file(rows, 1)
+    cached_file = cached.generate_feed_file(rows, 2)
+    plain_file = plain.generate_feed_file(rows, 3)
+
+    with gzip.open(plain_file, "rb") as f:
+        plain_bytes = f.read()
+    with gzip.open(cached_file, "rb") as f:
+        assert f.read() == plain_bytes
+    expected = json.dumps(
+        {"data": [plain.transform_record(row) for row in rows]})
+    assert plain_bytes == expected.encode()
+
+
+def test_cache_skips_transform_for_unchangedfacility_rows(tmp_path,
+                                                          monkeypatch,
+                                                          facility_rows):
+    monkeypatch.chdir(tmp_path)
+    cache = EncodedRecordCache(str(tmp_path / "cache.db"),
+                               FacilityFeedGenerator.mapping_version, 100)
+    generator = FacilityFeedGenerator(cache)
+    generator.generate_feed_file(facility_rows(10), 1)
+
+    rows = facility_rows(9) + facility_rows(10, "Renamed")[9:]
+    with patch.object(generator, "transform_record",
+                      wraps=generator.transform_record) as transform:
+        generator.generate_feed_file(rows, 2)
+
+    transform.assert_called_once_with(rows[9])
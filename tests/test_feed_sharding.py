@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from app.feed.sharding import ShardManifestMerger, shard_feed_file_format, \
+    shard_manifest_name
+from app.storage.local import LocalStorageAdapter
+
+
+def test_shard_names():
+    assert shard_manifest_name(2, 16) == "metadata.shard-0002-of-0016.json"
+    assert shard_feed_file_format(2, 16).format(timestamp=7) == \
+        "facility_feed_0002-of-0016_7.json.gz"
+
+
+def _write_manifest(storage_dir, index, feed_files, timestamp,
+                    run_id="run-1"):
+    storage_dir.mkdir(exist_ok=True)
+    (storage_dir / shard_manifest_name(index, 2)).write_text(json.dumps({
+        "generation_timestamp": timestamp,
+        "name": "test.feed",
+        "data_file": feed_files,
+        "run_id": run_id,
+    }))
+
+
+@pytest.mark.asyncio
+async def test_merge_combines_manifests_in_shard_order(tmp_path,
+                                                       monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage_dir = tmp_path / "storage"
+    _write_manifest(storage_dir, 1, ["b1.json.gz"], 200)
+    _write_manifest(storage_dir, 0, ["a1.json.gz", "a2.json.gz"], 100)
+    merger = ShardManifestMerger(LocalStorageAdapter(str(storage_dir)),
+                                 shard_count=2, feed_name="test.feed",
+                                 run_id="run-1")
+
+    assert await merger.merge()
+    first = (storage_dir / "metadata.json").read_text()
+    assert json.loads(first) == {
+        "generation_timestamp": 200,
+        "name": "test.feed",
+        "data_file": ["a1.json.gz", "a2.json.gz", "b1.json.gz"],
+    }
+
+    # Repeating the merge publishes the same metadata.
+    assert await merger.merge()
+    assert (storage_dir / "metadata.json").read_text() == first
+
+
+@pytest.mark.asyncio
+async def test_merge_waits_for_every_shard(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage_dir = tmp_path / "storage"
+    _write_manifest(storage_dir, 0, ["a1.json.gz"], 100)
+    merger = ShardManifestMerger(LocalStorageAdapter(str(storage_dir)),
+                                 shard_count=2, run_id="run-1")
+
+    assert not await merger.merge()
+    assert not (storage_dir / "metadata.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_merge_rejects_manifest_from_another_run(tmp_path,
+                                                       monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage_dir = tmp_path / "storage"
+    _write_manifest(storage_dir, 0, ["a1.json.gz"], 100, "run-2")
+    # Shard 1 failed in run-2; its manifest is left over from run-1.
+    _write_manifest(storage_dir, 1, ["b1.json.gz"], 50, "run-1")
+    merger = ShardManifestMerger(LocalStorageAdapter(str(storage_dir)),
+                                 shard_count=2, run_id="run-2")
+
+    assert not await merger.merge()
+    assert not (storage_dir / "metadata.json").exists()
@@ -0,0 +1,169 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.updates import ChangeBatcher, FacilityUpdateService
+
+
+class StubListenConnection:
+    """Records the listener so tests can deliver notifications."""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.on_lost = {}
+
+    async def listen(self, channel, callback, on_lost=None):
+        self.callbacks[channel] = callback
+        self.on_lost[channel] = on_lost
+
+    async def unlisten(self, channel):
+        self.callbacks.pop(channel)
+
+    def notify(self, channel, payload):
+        self.callbacks[channel](payload)
+
+
+@pytest.mark.asyncio
+async def test_batcher_releases_after_window():
+    batcher = ChangeBatcher(window=0.05, max_size=10)
+    batcher.add(3)
+    batcher.add(1)
+    batcher.add(3)
+
+    start = asyncio.get_running_loop().time()
+    batch = await batcher.next_batch()
+
+    assert batch == [3, 1]
+    assert asyncio.get_running_loop().time() - start >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_batcher_window_starts_at_first_arrival():
+    batcher = ChangeBatcher(window=0.05, max_size=10)
+    batcher.add(1)
+    # The previous batch was still being published for the whole window.
+    await asyncio.sleep(0.06)
+
+    assert await asyncio.wait_for(batcher.next_batch(), 0.02) == [1]
+
+
+@pytest.mark.asyncio
+async def test_batcher_releases_full_batch_immediately():
+    batcher = ChangeBatcher(window=10, max_size=2)
+    for entity_id in (1, 2, 3):
+        batcher.add(entity_id)
+
+    assert await asyncio.wait_for(batcher.next_batch(), 1) == [1, 2]
+    batcher.close()
+    assert await asyncio.wait_for(batcher.next_batch(), 1) == [3]
+    assert await batcher.next_batch() == []
+
+
+@pytest.mark.asyncio
+async def test_service_publishes_notified_changes(tmp_path, monkeypatch,
+                                                  facility_rows):
+    monkeypatch.chdir(tmp_path)
+    connection = StubListenConnection()
+    repository = MagicMock()
+    repository.fetch_facilities_by_ids = AsyncMock(
+        side_effect=lambda ids: [row for row in facility_rows(10)
+                                 if row["id"] in ids and row["id"] != 5])
+    storage_adapter = MagicMock()
+    storage_adapter.upload_file = AsyncMock(return_value=True)
+    service = FacilityUpdateService(
+        connection, repository, storage_adapter, FacilityFeedGenerator(),
+        channel="changes", batch_window=0.02, max_batch_size=100)
+
+    task = asyncio.create_task(service.run())
+    await asyncio.sleep(0)
+    for payload in ("4", "5", "4", "not-an-id"):
+        connection.notify("changes", payload)
+    await asyncio.sleep(0.1)
+    service.stop()
+    await asyncio.wait_for(task, 1)
+
+    repository.fetch_facilities_by_ids.assert_called_once_with([4, 5])
+    feed_file = storage_adapter.upload_file.call_args.args[0]
+    assert feed_file.startswith("facility_update_")
+    assert not connection.callbacks
+
+
+@pytest.mark.asyncio
+async def test_publish_batch_skips_fully_deleted_batch():
+    repository = MagicMock()
+    repository.fetch_facilities_by_ids = AsyncMock(return_value=[])
+    storage_adapter = MagicMock()
+    storage_adapter.upload_file = AsyncMock()
+    service = FacilityUpdateService(
+        StubListenConnection(), repository, storage_adapter,
+        FacilityFeedGenerator())
+
+    assert await service.publish_batch([8]) is None
+    storage_adapter.upload_file.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_service_fails_when_listen_is_lost(tmp_path, monkeypatch,
+                                                 facility_rows):
+    monkeypatch.chdir(tmp_path)
+    connection = StubListenConnection()
+    repository = MagicMock()
+    repository.fetch_facilities_by_ids = AsyncMock(
+        side_effect=lambda ids: [row for row in facility_rows(10)
+                                 if row["id"] in ids])
+    storage_adapter = MagicMock()
+    storage_adapter.upload_file = AsyncMock(return_value=True)
+    service = FacilityUpdateService(
+        connection, repository, storage_adapter, FacilityFeedGenerator(),
+        channel="changes", batch_window=10, max_batch_size=100)
+
+    task = asyncio.create_task(service.run())
+    await asyncio.sleep(0)
+    connection.notify("changes", "4")
+    connection.on_lost["changes"](OSError("connection refused"))
+
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(task, 1)
+    # The pending change is still published before stopping.
+    repository.fetch_facilities_by_ids.assert_called_once_with([4])
+
+
+@pytest.mark.asyncio
+async def test_batcher_requeue_puts_batch_first():
+    batcher = ChangeBatcher(window=0, max_size=10)
+    batcher.add(1)
+    batch = await batcher.next_batch()
+    batcher.add(2)
+    batcher.requeue(batch)
+
+    assert await batcher.next_batch() == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_service_retries_failed_batches(tmp_path, monkeypatch,
+                                              facility_rows):
+    monkeypatch.chdir(tmp_path)
+    connection = StubListenConnection()
+    repository = MagicMock()
+    repository.fetch_facilities_by_ids = AsyncMock(side_effect=[
+        asyncio.TimeoutError(),
+        facility_rows(1),
+        facility_rows(1)])
+    storage_adapter = MagicMock()
+    storage_adapter.upload_file = AsyncMock(side_effect=[False, True])
+    service = FacilityUpdateService(
+        connection, repository, storage_adapter, FacilityFeedGenerator(),
+        channel="changes", batch_window=0.01, max_batch_size=100)
+    service.retry_delay = 0.01
+
+    task = asyncio.create_task(service.run())
+    await asyncio.sleep(0)
+    connection.notify("changes", "1")
+    await asyncio.sleep(0.2)
+    service.stop()
+    await asyncio.wait_for(task, 1)
+
+    assert repository.fetch_facilities_by_ids.call_count == 3
+    assert storage_adapter.upload_file.call_count == 2
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+# Upper bound for the cumulative import time of main.py, in microseconds.
+# main imports in 100-160ms; an eager aioboto3 import adds 250-350ms and
+# trips the budget. asyncpg and aiomysql only add 15-30ms on top of main,
+# within the noise, so test_main_does_not_import_drivers catches those.
+IMPORT_TIME_BUDGET_US = int(
+    os.getenv("IMPORT_TIME_BUDGET_US", "250000"))
+
+LAZY_MODULES = ("asyncpg", "aiomysql", "aioboto3", "botocore")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_times(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_main_does_not_import_drivers():
+    times = _import_times("main")
+
+    for module in LAZY_MODULES:
+        assert module not in times, f"{module} imported at startup"
+
+
+def test_main_import_time_budget():
+    times = _import_times("main")
+
+    assert times["main"] < IMPORT_TIME_BUDGET_US
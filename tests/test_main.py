@@ -0,0 +1,269 @@
+import asyncio
+import gzip
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.feed.facilityjson_generator import FacilityJsonFeedGenerator
+from app.repositories.facility_json import FacilityJsonRepository
+from main import FacilityFeedService
+
+
+def _make_service(facilities, tmp_path):
+    repository = MagicMock()
+
+    async def fetch_facilities_chunk(offset, chunk_size):
+        return facilities[offset:offset + chunk_size]
+
+    repository.fetch_facilities_chunk = AsyncMock(
+        side_effect=fetch_facilities_chunk)
+    storage_adapter = MagicMock()
+    storage_adapter.upload_file = AsyncMock(return_value=True)
+
+    service = FacilityFeedService(
+        repository, storage_adapter, FacilityFeedGenerator())
+    service.chunk_size = 10
+    service.change_index_path = str(tmp_path / "entity_hashes.idx")
+    return service
+
+
+@pytest.mark.asyncio
+async def test_run_uploads_feed_and_metadata(tmp_path, monkeypatch,
+                                             facility_rows):
+    monkeypatch.chdir(tmp_path)
+    service = _make_service(facility_rows(25), tmp_path)
+    service.change_detection = False
+    service.loop_watchdog = True
+
+    report = await service.run()
+
+    assert report.published
+    assert report.records == 25
+    assert report.loop_lag is not None
+    assert len(report.feed_files) == 3
+    # 3 feed files and the metadata file
+    assert service.storage_adapter.upload_file.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_run_skips_publish_without_changes(tmp_path, monkeypatch,
+                                                 facility_rows):
+    monkeypatch.chdir(tmp_path)
+    facilities = facility_rows(25)
+    first = _make_service(facilities, tmp_path)
+    first.change_detection = True
+    first_report = await first.run()
+    assert first_report.changes.added == 25
+    assert first_report.published
+
+    published_files = set(tmp_path.glob("*.json.gz"))
+    second = _make_service(facilities, tmp_path)
+    second.change_detection = True
+    second_report = await second.run()
+
+    assert not second_report.changes.has_changes
+    assert not second_report.published
+    second.storage_adapter.upload_file.assert_not_called()
+    # One pass over the table, and no feed files left behind.
+    assert second.repository.fetch_facilities_chunk.call_count == 4
+    assert set(tmp_path.glob("*.json.gz")) == published_files
+
+
+@pytest.mark.asyncio
+async def test_run_publishes_changes(tmp_path, monkeypatch, facility_rows):
+    monkeypatch.chdir(tmp_path)
+    first = _make_service(facility_rows(25), tmp_path)
+    first.change_detection = True
+    await first.run()
+
+    facilities = facility_rows(20) + facility_rows(30, "Renamed")[20:]
+    second = _make_service(facilities, tmp_path)
+    second.change_detection = True
+    report = await second.run()
+
+    assert (report.changes.added, report.changes.changed,
+            report.changes.deleted) == (5, 5, 0)
+    assert report.published
+
+
+@pytest.mark.asyncio
+async def test_run_records_adaptive_chunk_sizes(tmp_path, monkeypatch,
+                                                facility_rows):
+    monkeypatch.chdir(tmp_path)
+    service = _make_service(facility_rows(95), tmp_path)
+    service.change_detection = False
+    service.adaptive_chunking = True
+
+    report = await service.run()
+
+    assert report.records == 95
+    assert report.chunk_sizes[0] == 10
+    assert report.chunk_sizes[1] == 20
+    assert sum(report.chunk_sizes[:-1]) >= 95
+
+
+@pytest.mark.asyncio
+async def test_run_uploads_shard_manifest(tmp_path, monkeypatch,
+                                          facility_rows):
+    monkeypatch.chdir(tmp_path)
+    service = _make_service(facility_rows(5), tmp_path)
+    service.change_detection = False
+    service.metadata_filename = "metadata.shard-0001-of-0002.json"
+    service.run_id = "run-1"
+
+    await service.run()
+
+    manifest_path = service.storage_adapter.upload_file.call_args.args[0]
+    assert manifest_path == "metadata.shard-0001-of-0002.json"
+    manifest = json.loads((tmp_path / manifest_path).read_text())
+    assert manifest["run_id"] == "run-1"
+
+
+@pytest.mark.asyncio
+async def test_run_overlaps_uploads_within_memory_budget(tmp_path, monkeypatch,
+                                                         facility_rows):
+    monkeypatch.chdir(tmp_path)
+    service = _make_service(facility_rows(50), tmp_path)
+    service.change_detection = False
+    service.memory_budget = 64 * 1024
+    in_flight = []
+    most_in_flight = 0
+
+    async def upload_file(file_path, *_):
+        nonlocal most_in_flight
+        in_flight.append(file_path)
+        most_in_flight = max(most_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(file_path)
+        return True
+
+    service.storage_adapter.upload_file = AsyncMock(side_effect=upload_file)
+
+    report = await service.run()
+
+    assert report.published
+    assert report.records == 50
+    # 5 feed files and the metadata file
+    assert service.storage_adapter.upload_file.call_count == 6
+    assert most_in_flight > 1
+    assert 0 < report.peak_reserved_bytes <= service.memory_budget
+    assert report.peak_rss_bytes > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("adaptive_chunking", [False, True])
+async def test_run_publishes_database_json_records(tmp_path, monkeypatch,
+                                                   adaptive_chunking,
+                                                   facility_rows):
+    monkeypatch.chdir(tmp_path)
+    facilities = facility_rows(25)
+    texts = [fragment.decode() for fragment in
+             FacilityFeedGenerator().encode_records(facilities)]
+    db_connection = MagicMock()
+
+    async def execute_prepared(_name, offset, limit):
+        return [{"record": text} for text in texts[offset:offset + limit]]
+
+    db_connection.execute_prepared = AsyncMock(side_effect=execute_prepared)
+    service = _make_service(facilities, tmp_path)
+    service.repository = FacilityJsonRepository(db_connection)
+    service.feed_generator = FacilityJsonFeedGenerator()
+    service.change_detection = True
+    service.adaptive_chunking = adaptive_chunking
+    # A single chunk, so its feed file can be compared as a whole.
+    service.chunk_size = 50
+
+    report = await service.run()
+
+    assert report.published
+    assert report.records == 25
+    assert report.changes.added == 25
+    with gzip.open(report.feed_files[0], "rt", encoding="utf-8") as f:
+        assert json.load(f)["data"] == \
+            [FacilityFeedGenerator().transform_record(facility)
+             for facility in facilities]
+
+
+@pytest.mark.asyncio
+async def test_memory_budget_blocks_fetch_until_upload_ends(tmp_path,
+                                                            monkeypatch,
+                                                            facility_rows):
+    monkeypatch.chdir(tmp_path)
+    facilities = facility_rows(30)
+    service = _make_service(facilities, tmp_path)
+    service.change_detection = False
+    # One chunk's reservation fills the whole budget.
+    service.memory_budget = 1
+    events = []
+
+    async def fetch_facilities_chunk(offset, chunk_size):
+        events.append("fetch")
+        return facilities[offset:offset + chunk_size]
+
+    async def upload_file(file_path, *_):
+        if file_path.endswith(".json.gz"):
+            await asyncio.sleep(0.01)
+            events.append("uploaded")
+        return True
+
+    service.repository.fetch_facilities_chunk = AsyncMock(
+        side_effect=fetch_facilities_chunk)
+    service.storage_adapter.upload_file = AsyncMock(side_effect=upload_file)
+
+    report = await service.run()
+
+    assert report.published
+    # Each fetch waited for the previous chunk's upload to release it.
+    assert events == ["fetch", "uploaded"] * 3 + ["fetch"]
+
+
+@pytest.mark.asyncio
+async def test_failed_background_upload_fails_the_run(tmp_path, monkeypatch,
+                                                      facility_rows):
+    monkeypatch.chdir(tmp_path)
+    service = _make_service(facility_rows(30), tmp_path)
+    service.change_detection = False
+    service.memory_budget = 64 * 1024
+    service.storage_adapter.upload_file = AsyncMock(
+        side_effect=[True, OSError("disk full"), True, True])
+
+    report = await service.run()
+
+    assert not report.published
+    assert service.storage_adapter.upload_file.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_fetch_error_cancels_background_uploads(tmp_path, monkeypatch,
+                                                      facility_rows):
+    monkeypatch.chdir(tmp_path)
+    facilities = facility_rows(30)
+    service = _make_service(facilities, tmp_path)
+    service.change_detection = False
+    service.memory_budget = 64 * 1024
+    cancelled = []
+
+    async def fetch_facilities_chunk(offset, chunk_size):
+        if offset:
+            # Let the first chunk's upload start before failing.
+            await asyncio.sleep(0.01)
+            raise ConnectionError("database went away")
+        return facilities[offset:offset + chunk_size]
+
+    async def upload_file(*_):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return True
+
+    service.repository.fetch_facilities_chunk = AsyncMock(
+        side_effect=fetch_facilities_chunk)
+    service.storage_adapter.upload_file = AsyncMock(side_effect=upload_file)
+
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(service.run(), 1)
+    assert cancelled == [True]
@@ -0,0 +1,163 @@
+"""
+Performance guards for the feed path.
+
+The feed generator and the service run against an in-process database and
+storage adapter, so no external services are needed. Throughput floors are
+relative to a baseline calibrated on the same machine (plain json.dump of
+the same rows into a gzip file), which keeps them stable across hardware.
+"""
+import asyncio
+import gzip
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, List
+
+import pytest
+
+from app.db.connection import BaseDBConnection
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.repositories.facility import FacilityRepository
+from app.storage.interfaces import StorageInterface
+from main import FacilityFeedService
+
+GENERATOR_RECORDS = 2000
+SERVICE_RECORDS = 10000
+SERVICE_CHUNK_SIZE = 500
+
+# Peak traced allocation per record while encoding a single chunk.
+GENERATOR_PEAK_BYTES_PER_RECORD = 2048
+# Peak traced allocation per record over a whole run; chunks are encoded
+# and released one at a time, so this must stay far below the above.
+SERVICE_PEAK_BYTES_PER_RECORD = 256
+# Minimum records/sec as a fraction of the calibrated baseline.
+GENERATOR_MIN_RELATIVE_THROUGHPUT = 0.5
+SERVICE_MIN_RELATIVE_THROUGHPUT = 0.3
+
+pytestmark = pytest.mark.perf
+
+
+class InMemoryDBConnection(BaseDBConnection):  # pylint: disable=abstract-method
+    """Serves facility chunks from a list instead of a database."""
+
+    def __init__(self, rows: List[dict]):
+        super().__init__()
+        self.rows = rows
+
+    async def connect(self):
+        return None
+
+    async def disconnect(self):
+        return None
+
+    async def execute_query(self, query: str, *params: Any) -> List[Any]:
+        offset, limit = params
+        return self.rows[offset:offset + limit]
+
+    async def warm_up(self, size: int = None) -> None:
+        return None
+
+
+class DiscardingStorageAdapter(StorageInterface):  # pylint: disable=abstract-method
+    """Counts uploaded bytes and deletes the file."""
+
+    def __init__(self):
+        self.uploaded_bytes = 0
+
+    async def upload_file(self,
+                          file_path: str,
+                          content_type: str,
+                          content_encoding: str,
+                          retries: int = 3,
+                          initial_delay: float = 2.0) -> bool:
+        self.uploaded_bytes += os.path.getsize(file_path)
+        os.remove(file_path)
+        return True
+
+
+def _best_seconds(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_bytes(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(name="baseline_rate")
+def fixture_baseline_rate(tmp_path, facility_rows):
+    """Records/sec of a plain json.dump of raw rows into a gzip file."""
+    rows = facility_rows(GENERATOR_RECORDS)
+    path = tmp_path / "baseline.json.gz"
+
+    def encode():
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"data": rows}, f)
+
+    return GENERATOR_RECORDS / _best_seconds(encode)
+
+
+def test_generator_peak_memory_per_record(tmp_path, monkeypatch,
+                                          facility_rows):
+    monkeypatch.chdir(tmp_path)
+    generator = FacilityFeedGenerator()
+    rows = facility_rows(GENERATOR_RECORDS)
+
+    peak = _peak_bytes(lambda: generator.generate_feed_file(rows, 1))
+
+    assert peak / GENERATOR_RECORDS < GENERATOR_PEAK_BYTES_PER_RECORD
+
+
+def test_generator_throughput(tmp_path, monkeypatch, baseline_rate,
+                              facility_rows):
+    monkeypatch.chdir(tmp_path)
+    generator = FacilityFeedGenerator()
+    rows = facility_rows(GENERATOR_RECORDS)
+
+    rate = GENERATOR_RECORDS / _best_seconds(
+        lambda: generator.generate_feed_file(rows, 1))
+
+    assert rate > baseline_rate * GENERATOR_MIN_RELATIVE_THROUGHPUT
+
+
+def _run_service(rows):
+
+    service = FacilityFeedService(
+        FacilityRepository(InMemoryDBConnection(rows)),
+        DiscardingStorageAdapter(),
+        FacilityFeedGenerator())
+    service.chunk_size = SERVICE_CHUNK_SIZE
+    service.change_detection = False
+    service.adaptive_chunking = False
+    report = asyncio.run(service.run())
+    assert report.records == len(rows)
+
+
+def test_service_peak_memory_per_record(tmp_path, monkeypatch, facility_rows):
+    monkeypatch.chdir(tmp_path)
+    rows = facility_rows(SERVICE_RECORDS)
+
+    peak = _peak_bytes(lambda: _run_service(rows))
+
+    assert peak / SERVICE_RECORDS < SERVICE_PEAK_BYTES_PER_RECORD
+
+
+def test_service_throughput(tmp_path, monkeypatch, baseline_rate,
+                            facility_rows):
+    monkeypatch.chdir(tmp_path)
+    rows = facility_rows(SERVICE_RECORDS)
+
+    rate = SERVICE_RECORDS / _best_seconds(lambda: _run_service(rows),
+                                           repeat=2)
+
+    assert rate > baseline_rate * SERVICE_MIN_RELATIVE_THROUGHPUT
@@ -1,17 +1,38 @@
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+from app.db.queries import GET_FACILITIES_QUERY, GET_FACILITIES_STATEMENT, \
+    GET_FACILITIES_BY_IDS_QUERY, GET_FACILITIES_BY_IDS_STATEMENT
 from app.repositories.facility import FacilityRepository
 
 
 @pytest.mark.asyncio
 async def test_fetch_facilities_chunk():
-    mock_db = AsyncMock()
-    mock_db.execute_query.return_value = [{"id": 1, "name": "Test Facility"}]
+    mock_db = MagicMock()
+    mock_db.execute_prepared = AsyncMock(
+        return_value=[{"id": 1, "name": "Test Facility"}])
 
     repo = FacilityRepository(mock_db)
     result = await repo.fetch_facilities_chunk(0, 10)
 
     assert result == [{"id": 1, "name": "Test Facility"}]
-    mock_db.execute_query.assert_called_once()
+    mock_db.prepare_statement.assert_called_once_with(
+        GET_FACILITIES_STATEMENT, GET_FACILITIES_QUERY)
+    mock_db.execute_prepared.assert_called_once_with(
+        GET_FACILITIES_STATEMENT, 0, 10)
+
+
+@pytest.mark.asyncio
+async def test_fetch_facilities_by_ids():
+    mock_db = MagicMock()
+    mock_db.execute_prepared = AsyncMock(return_value=[{"id": 3}])
+
+    repo = FacilityRepository(mock_db)
+    result = await repo.fetch_facilities_by_ids((3, 9))
+
+    assert result == [{"id": 3}]
+    mock_db.prepare_statement.assert_called_with(
+        GET_FACILITIES_BY_IDS_STATEMENT, GET_FACILITIES_BY_IDS_QUERY)
+    mock_db.execute_prepared.assert_called_once_with(
+        GET_FACILITIES_BY_IDS_STATEMENT, [3, 9])
@@ -0,0 +1,47 @@
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.db.queries import GET_FACILITIES_JSON_QUERY, \
+    GET_FACILITIES_JSON_STATEMENT, GET_FACILITIES_QUERY
+from app.feed.facilityfeed_generator import FacilityFeedGenerator
+from app.repositories.facility_json import FacilityJsonRepository
+
+# DSN of a PostgreSQL database initialised with db-init.sql; the
+# equivalence test against the real query is skipped without it.
+TEST_POSTGRES_DSN = os.getenv("TEST_POSTGRES_DSN")
+
+
+@pytest.mark.asyncio
+async def test_fetch_facilities_chunk_returns_record_texts():
+    mock_db = MagicMock()
+    mock_db.execute_prepared = AsyncMock(
+        return_value=[{"record": '{"entity_id" : 1}'}])
+
+    repo = FacilityJsonRepository(mock_db)
+    result = await repo.fetch_facilities_chunk(20, 10)
+
+    assert result == ['{"entity_id" : 1}']
+    mock_db.prepare_statement.assert_called_once_with(
+        GET_FACILITIES_JSON_STATEMENT, GET_FACILITIES_JSON_QUERY)
+    mock_db.execute_prepared.assert_called_once_with(
+        GET_FACILITIES_JSON_STATEMENT, 20, 10)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_POSTGRES_DSN, reason="TEST_POSTGRES_DSN not set")
+async def test_database_records_match_transform_record():
+    import asyncpg  # pylint: disable=import-outside-toplevel
+
+    connection = await asyncpg.connect(TEST_POSTGRES_DSN)
+    try:
+        rows = await connection.fetch(GET_FACILITIES_QUERY, 0, 100)
+        texts = await connection.fetch(GET_FACILITIES_JSON_QUERY, 0, 100)
+    finally:
+        await connection.close()
+
+    generator = FacilityFeedGenerator()
+    assert [json.loads(text["record"]) for text in texts] == \
+        [generator.transform_record(row) for row in rows]
@@ -0,0 +1,26 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.db.queries import GET_FACILITIES_SHARD_QUERY, \
+    GET_FACILITIES_SHARD_STATEMENT
+from app.repositories.sharded import ShardedFacilityRepository
+
+
+@pytest.mark.asyncio
+async def test_fetch_facilities_chunk_queries_shard():
+    db = MagicMock()
+    db.execute_prepared = AsyncMock(return_value=[{"id": 51}])
+    repo = ShardedFacilityRepository(db, shard_index=1, shard_count=2)
+
+    assert await repo.fetch_facilities_chunk(10, 10) == [{"id": 51}]
+
+    db.prepare_statement.assert_called_once_with(
+        GET_FACILITIES_SHARD_STATEMENT, GET_FACILITIES_SHARD_QUERY)
+    db.execute_prepared.assert_called_once_with(
+        GET_FACILITIES_SHARD_STATEMENT, 10, 10, 2, 1)
+
+
+def test_rejects_shard_index_out_of_range():
+    with pytest.raises(ValueError):
+        ShardedFacilityRepository(MagicMock(), shard_index=2, shard_count=2)
@@ -0,0 +1,132 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.repositories.snapshot import FacilitySnapshot, SnapshotWriter, \
+    SnapshotFacilityRepository
+
+
+def _mock_db(facilities):
+    db = MagicMock()
+
+    async def execute_prepared(_name, offset, limit):
+        return facilities[offset:offset + limit]
+
+    db.execute_prepared = AsyncMock(side_effect=execute_prepared)
+    db.execute_query = AsyncMock(side_effect=lambda _query: [{
+        "row_count": len(facilities),
+        "max_id": facilities[-1]["id"] if facilities else None,
+        "checksum": sum(hash(tuple(f.items())) for f in facilities),
+    }])
+    return db
+
+
+def test_snapshot_round_trip(tmp_path, facility_rows):
+    path = str(tmp_path / "snapshot.bin")
+    facilities = facility_rows(25)
+    writer = SnapshotWriter()
+    writer.append(facilities[:10])
+    writer.append(facilities[10:])
+    writer.write(path, {"row_count": 25, "max_id": 25})
+
+    snapshot = FacilitySnapshot(path)
+    try:
+        assert snapshot.row_count == 25
+        assert snapshot.rows(0, 25) == facilities
+        assert snapshot.rows(20, 100) == facilities[20:]
+        assert snapshot.rows(30, 40) == []
+        assert snapshot.index_of(7) == 6
+        assert snapshot.index_of(99) is None
+    finally:
+        snapshot.close()
+
+
+def test_snapshot_promotes_int_column_to_float(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    writer = SnapshotWriter()
+    writer.append([{"id": 1, "latitude": None},
+                   {"id": 2, "latitude": 40},
+                   {"id": 3, "latitude": 40.5}])
+    writer.write(path, {})
+
+    snapshot = FacilitySnapshot(path)
+    try:
+        assert snapshot.rows(0, 3) == [{"id": 1, "latitude": None},
+                                       {"id": 2, "latitude": 40.0},
+                                       {"id": 3, "latitude": 40.5}]
+    finally:
+        snapshot.close()
+
+
+def test_snapshot_rejects_foreign_file(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(b"not a snapshot at all")
+
+    with pytest.raises(ValueError):
+        FacilitySnapshot(str(path))
+
+
+@pytest.mark.asyncio
+async def test_snapshot_repository_reuses_fresh_snapshot(tmp_path,
+                                                         facility_rows):
+    path = str(tmp_path / "snapshot.bin")
+    facilities = facility_rows(25)
+    db = _mock_db(facilities)
+
+    repo = SnapshotFacilityRepository(db, path, max_age=60, fetch_size=10)
+    assert await repo.fetch_facilities_chunk(0, 10) == facilities[:10]
+    assert await repo.fetch_facilities_chunk(20, 10) == facilities[20:]
+    assert db.execute_prepared.call_count == 4
+
+    db.execute_prepared.reset_mock()
+    second_repo = SnapshotFacilityRepository(db, path, max_age=60)
+    assert await second_repo.fetch_facilities_chunk(10, 10) \
+        == facilities[10:20]
+    db.execute_prepared.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_repository_rebuilds_on_probe_change(tmp_path,
+                                                            facility_rows):
+    path = str(tmp_path / "snapshot.bin")
+    await SnapshotFacilityRepository(
+        _mock_db(facility_rows(5)), path, max_age=60).fetch_facilities_chunk(
+            0, 10)
+
+    facilities = facility_rows(8)
+    db = _mock_db(facilities)
+    repo = SnapshotFacilityRepository(db, path, max_age=60)
+
+    assert await repo.fetch_facilities_chunk(0, 10) == facilities
+    db.execute_prepared.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_repository_rebuilds_when_expired(tmp_path,
+                                                         facility_rows):
+    path = str(tmp_path / "snapshot.bin")
+    facilities = facility_rows(5)
+    await SnapshotFacilityRepository(
+        _mock_db(facilities), path, max_age=60).fetch_facilities_chunk(0, 10)
+
+    db = _mock_db(facilities)
+    repo = SnapshotFacilityRepository(db, path, max_age=0)
+
+    assert await repo.fetch_facilities_chunk(0, 10) == facilities
+    db.execute_prepared.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_repository_rebuilds_on_update(tmp_path, facility_rows):
+    path = str(tmp_path / "snapshot.bin")
+    facilities = facility_rows(5)
+    await SnapshotFacilityRepository(
+        _mock_db(facilities), path, max_age=60).fetch_facilities_chunk(0, 10)
+
+    # Same row count and max id, but one row changed in place.
+    facilities[2] = {**facilities[2], "name": "Renamed"}
+    db = _mock_db(facilities)
+    repo = SnapshotFacilityRepository(db, path, max_age=60)
+
+    assert await repo.fetch_facilities_chunk(0, 10) == facilities
+    db.execute_prepared.assert_called()
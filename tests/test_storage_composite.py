@@ -0,0 +1,78 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.storage.composite import CompositeStorageAdapter
+from app.storage.interfaces import StorageInterface
+from app.storage.local import LocalStorageAdapter
+
+
+class FlakyStorageAdapter(StorageInterface):  # pylint: disable=abstract-method
+    """Fails a number of attempts before succeeding."""
+
+    def __init__(self, failures):
+        self.keep_source = False
+        self.failures = failures
+        self.attempts = 0
+
+    async def upload_file(self,
+                          file_path: str,
+                          content_type: str,
+                          content_encoding: str,
+                          retries: int = 3,
+                          initial_delay: float = 2.0) -> bool:
+        self.attempts += 1
+        return self.attempts > self.failures
+
+
+@pytest.mark.asyncio
+async def test_upload_to_every_destination_then_delete(tmp_path):
+    file_path = tmp_path / "feed.json.gz"
+    file_path.write_bytes(b"feed")
+    composite = CompositeStorageAdapter({
+        "primary": LocalStorageAdapter(str(tmp_path / "primary")),
+        "archive": LocalStorageAdapter(str(tmp_path / "archive")),
+    })
+
+    assert await composite.upload_file(str(file_path), "application/json",
+                                       "gzip")
+
+    assert (tmp_path / "primary" / "feed.json.gz").read_bytes() == b"feed"
+    assert (tmp_path / "archive" / "feed.json.gz").read_bytes() == b"feed"
+    assert not file_path.exists()
+    assert composite.summary()["archive"]["uploads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_each_destination_and_keeps_file_on_failure(tmp_path):
+    file_path = tmp_path / "feed.json.gz"
+    file_path.write_bytes(b"feed")
+    flaky, broken = FlakyStorageAdapter(1), FlakyStorageAdapter(5)
+    composite = CompositeStorageAdapter({"flaky": flaky, "broken": broken})
+
+    assert not await composite.upload_file(
+        str(file_path), "application/json", "gzip", retries=3,
+        initial_delay=0)
+
+    assert file_path.exists()
+    assert flaky.attempts == 2
+    assert broken.attempts == 3
+    summary = composite.summary()
+    assert summary["flaky"]["uploads"] == 1
+    assert summary["flaky"]["retries"] == 1
+    assert summary["broken"]["failures"] == 1
+
+
+def test_destinations_keep_source():
+    adapter = LocalStorageAdapter()
+
+    CompositeStorageAdapter({"local": adapter})
+
+    assert adapter.keep_source
+
+
+def test_rejects_adapter_without_keep_source():
+    adapter = AsyncMock(spec=["upload_file"])
+
+    with pytest.raises(ValueError):
+        CompositeStorageAdapter({"other": adapter})
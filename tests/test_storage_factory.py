@@ -0,0 +1,28 @@
+import pytest
+
+from app.storage.composite import CompositeStorageAdapter
+from app.storage.factory import StorageAdapterFactory
+from app.storage.local import LocalStorageAdapter
+from app.storage.s3 import S3StorageAdapter
+
+
+@pytest.mark.parametrize("storage_type, expected_class", [
+    ("s3", S3StorageAdapter),
+    ("local", LocalStorageAdapter)
+])
+def test_get_storage_adapter(storage_type, expected_class):
+    adapter = StorageAdapterFactory.get_storage_adapter(storage_type)
+    assert isinstance(adapter, expected_class)
+
+
+def test_get_storage_adapter_invalid():
+    with pytest.raises(ValueError):
+        StorageAdapterFactory.get_storage_adapter("invalid_storage_type")
+
+
+def test_get_storage_adapter_for_several_destinations():
+    adapter = StorageAdapterFactory.get_storage_adapter("s3, local")
+
+    assert isinstance(adapter, CompositeStorageAdapter)
+    assert list(adapter.adapters) == ["s3", "local"]
+    assert isinstance(adapter.adapters["s3"], S3StorageAdapter)
@@ -1,58 +1,129 @@
+import errno
 import os
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 
 import pytest
 import pytest_asyncio
 
-from app.storage.local import LocalStorageAdapter
+from app.storage.local import LocalStorageAdapter, _copy_file
 
 
 @pytest_asyncio.fixture
-def storage_adapter():
-    return LocalStorageAdapter()
+def storage_adapter(tmp_path):
+    return LocalStorageAdapter(str(tmp_path / "local_storage"))
 
 
 @pytest.mark.asyncio
-@patch("builtins.open", new_callable=mock_open, read_data=b"file content")
-@patch("os.makedirs")
-@patch("os.remove")
-async def test_upload_file(mock_remove,
-                           mock_makedirs,
-                           mock_file_open,
+async def test_upload_file(tmp_path,
                            storage_adapter):  # pylint: disable=redefined-outer-name
-    file_path = "test_file.txt"
-    destination_path = os.path.join("local_storage", "test_file.txt")
+    file_path = tmp_path / "test_file.txt"
+    file_path.write_bytes(b"file content")
+    destination_path = tmp_path / "local_storage" / "test_file.txt"
 
     result = await storage_adapter.upload_file(
-        file_path,
+        str(file_path),
         "text/plain",
         "utf-8")
 
     assert result is True
-    mock_makedirs.assert_called_once_with("local_storage", exist_ok=True)
-    # Ensure source file was opened
-    mock_file_open.assert_any_call(file_path, 'rb')
-    # Ensure destination file was opened
-    mock_file_open.assert_any_call(destination_path, 'wb')
-    # Ensure file deletion after upload
-    mock_remove.assert_called_once_with(file_path)
+    assert destination_path.read_bytes() == b"file content"
+    # Ensure source file is gone after upload
+    assert not file_path.exists()
 
 
 @pytest.mark.asyncio
-@patch("builtins.open", side_effect=OSError("Failed to open file"))
-@patch("os.makedirs")
-async def test_upload_file_failure(mock_makedirs,
-                                   mock_file_open,
+async def test_upload_file_keep_source(tmp_path):
+    file_path = tmp_path / "test_file.txt"
+    file_path.write_bytes(b"file content")
+    adapter = LocalStorageAdapter(str(tmp_path / "local_storage"),
+                                  keep_source=True)
+
+    result = await adapter.upload_file(str(file_path), "text/plain", "utf-8")
+
+    assert result is True
+    assert file_path.read_bytes() == b"file content"
+    assert (tmp_path / "local_storage" / "test_file.txt").read_bytes() \
+        == b"file content"
+
+
+@pytest.mark.asyncio
+@patch("os.replace", side_effect=OSError(errno.EXDEV, "Cross-device link"))
+async def test_upload_file_cross_device(mock_replace,
+                                        tmp_path,
+                                        # pylint: disable=redefined-outer-name
+                                        storage_adapter):
+    file_path = tmp_path / "test_file.txt"
+    file_path.write_bytes(b"x" * 100_000)
+
+    result = await storage_adapter.upload_file(
+        str(file_path),
+        "text/plain",
+        "utf-8")
+
+    assert result is True
+    mock_replace.assert_called_once()
+    assert (tmp_path / "local_storage" / "test_file.txt").read_bytes() \
+        == b"x" * 100_000
+    assert not file_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_upload_file_failure(tmp_path,
                                    # pylint: disable=redefined-outer-name
                                    storage_adapter):
-    file_path = "test_file.txt"
+    file_path = tmp_path / "missing_file.txt"
 
     result = await storage_adapter.upload_file(
-        file_path,
+        str(file_path),
         "text/plain",
         "utf-8")
 
     assert result is False
-    mock_makedirs.assert_called_once_with("local_storage", exist_ok=True)
-    # Ensure it attempted to open the file
-    mock_file_open.assert_called_once_with(file_path, 'rb')
+
+
+@pytest.mark.asyncio
+async def test_upload_files(tmp_path,
+                            storage_adapter):  # pylint: disable=redefined-outer-name
+    file_paths = []
+    for i in range(5):
+        file_path = tmp_path / f"test_file_{i}.txt"
+        file_path.write_text(str(i))
+        file_paths.append(str(file_path))
+
+    results = await storage_adapter.upload_files(
+        file_paths + [str(tmp_path / "missing_file.txt")],
+        "text/plain",
+        "utf-8",
+        max_concurrency=2)
+
+    assert results == [True] * 5 + [False]
+    assert sorted(os.listdir(tmp_path / "local_storage")) == [
+        f"test_file_{i}.txt" for i in range(5)]
+
+
+@patch("os.copy_file_range", side_effect=OSError(errno.EXDEV, "EXDEV"),
+       create=True)
+def test_copy_file_falls_back_to_sendfile(mock_copy_file_range, tmp_path):
+    source_path = tmp_path / "source.bin"
+    source_path.write_bytes(os.urandom(300_000))
+    destination_path = tmp_path / "destination.bin"
+
+    _copy_file(str(source_path), str(destination_path))
+
+    mock_copy_file_range.assert_called_once()
+    assert destination_path.read_bytes() == source_path.read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_download_file(tmp_path,
+                             storage_adapter):  # pylint: disable=redefined-outer-name
+    stored = tmp_path / "local_storage" / "manifest.json"
+    stored.parent.mkdir()
+    stored.write_bytes(b"{}")
+    destination = tmp_path / "downloaded.json"
+
+    assert await storage_adapter.download_file("manifest.json",
+                                               str(destination))
+    assert destination.read_bytes() == b"{}"
+    assert not await storage_adapter.download_file("missing.json",
+                                                   str(destination))
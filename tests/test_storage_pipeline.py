@@ -0,0 +1,87 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.storage.pipeline import UploadPipeline
+from app.utils.memory_budget import MemoryBudget
+
+
+def _storage():
+    storage_adapter = MagicMock()
+    storage_adapter.upload_file = AsyncMock(return_value=True)
+    return storage_adapter
+
+
+def _feed_file(tmp_path, name, size=100):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_uploads_held_files_before_the_next_one(tmp_path):
+    storage_adapter = _storage()
+    pipeline = UploadPipeline(storage_adapter)
+
+    pipeline.holding = True
+    await pipeline.submit(_feed_file(tmp_path, "a.json.gz"))
+    storage_adapter.upload_file.assert_not_called()
+
+    pipeline.holding = False
+    await pipeline.submit(_feed_file(tmp_path, "b.json.gz"))
+
+    assert await pipeline.finish()
+    uploaded = [call.args[0] for call in
+                storage_adapter.upload_file.call_args_list]
+    assert [path[-9:] for path in uploaded] == ["a.json.gz", "b.json.gz"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_discards_held_files(tmp_path):
+    storage_adapter = _storage()
+    budget = MemoryBudget(1000)
+    pipeline = UploadPipeline(storage_adapter, budget)
+    pipeline.holding = True
+
+    reserved = await budget.reserve(500)
+    await pipeline.submit(_feed_file(tmp_path, "a.json.gz"), reserved)
+    pipeline.discard()
+
+    storage_adapter.upload_file.assert_not_called()
+    assert not list(tmp_path.iterdir())
+    assert budget.reserved == 0
+
+
+@pytest.mark.asyncio
+async def test_pipeline_releases_budget_after_upload(tmp_path):
+    storage_adapter = _storage()
+    storage_adapter.upload_file = AsyncMock(return_value=False)
+    budget = MemoryBudget(1000)
+    pipeline = UploadPipeline(storage_adapter, budget)
+
+    reserved = await budget.reserve(500)
+    await pipeline.submit(_feed_file(tmp_path, "a.json.gz"), reserved)
+
+    assert not await pipeline.finish()
+    assert budget.reserved == 0
+    assert budget.peak_reserved == 500
+
+
+@pytest.mark.asyncio
+async def test_pipeline_uploads_held_files_over_budget(tmp_path):
+    storage_adapter = _storage()
+    budget = MemoryBudget(1000)
+    pipeline = UploadPipeline(storage_adapter, budget)
+
+    pipeline.holding = True
+    reserved = await budget.reserve(600)
+    await pipeline.submit(_feed_file(tmp_path, "a.json.gz", 600), reserved)
+    pipeline.holding = False
+    reserved = await budget.reserve(600)
+    await asyncio.wait_for(pipeline.submit(
+        _feed_file(tmp_path, "b.json.gz", 600), reserved), 1)
+
+    assert await pipeline.finish()
+    assert storage_adapter.upload_file.call_count == 2
+    assert budget.reserved == 0
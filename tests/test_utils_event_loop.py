@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from app.utils import event_loop
+
+
+async def _answer():
+    await asyncio.sleep(0)
+    return 42
+
+
+def test_run_on_asyncio():
+    assert event_loop.run(_answer(), "asyncio") == 42
+
+
+def test_run_on_uvloop_or_fallback():
+    assert event_loop.run(_answer(), "uvloop") == 42
+
+
+def test_run_rejects_unknown_engine():
+    with pytest.raises(ValueError):
+        event_loop.run(_answer(), "trio")
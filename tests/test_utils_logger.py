@@ -1,5 +1,10 @@
+import json
 import logging
-from app.utils.logger import get_logger
+from logging.handlers import QueueHandler
+
+from app.utils import logger as logger_module
+from app.utils.logger import JsonFormatter, SamplingFilter, get_logger, \
+    stop_log_listener
 
 
 def test_get_logger_returns_logger_instance():
@@ -24,3 +29,49 @@ def test_get_logger_configures_logger_correctly():
     assert handler.formatter._fmt == (
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
+
+
+def _make_record(msg, sampled=False):
+    record = logging.LogRecord(
+        "test_logger", logging.INFO, __file__, 1, msg, ("a",), None)
+    if sampled:
+        record.sampled = True
+    return record
+
+
+def test_sampling_filter_emits_every_nth_sampled_record():
+    sampling_filter = SamplingFilter(every=3)
+
+    results = [sampling_filter.filter(_make_record("Chunk %s", sampled=True))
+               for _ in range(7)]
+
+    assert results == [True, False, False, True, False, False, True]
+
+
+def test_sampling_filter_passes_unsampled_records():
+    sampling_filter = SamplingFilter(every=3)
+
+    assert all(sampling_filter.filter(_make_record("Error %s"))
+               for _ in range(5))
+
+
+def test_json_formatter_outputs_json():
+    line = JsonFormatter().format(_make_record("Hello %s"))
+
+    payload = json.loads(line)
+    assert payload["message"] == "Hello a"
+    assert payload["level"] == "INFO"
+    assert payload["name"] == "test_logger"
+
+
+def test_queue_mode_writes_from_background_thread(monkeypatch, capsys):
+    monkeypatch.setattr(logger_module, "LOG_MODE", "queue")
+
+    queue_logger = get_logger("test_queue_logger")
+    try:
+        assert isinstance(queue_logger.handlers[0], QueueHandler)
+        queue_logger.info("Queued %s", "message")
+        stop_log_listener()
+        assert "Queued message" in capsys.readouterr().err
+    finally:
+        queue_logger.handlers.clear()
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.loop_monitor import LoopLagWatchdog
+
+
+def _block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_captures_stack_of_blocking_code():
+    watchdog = LoopLagWatchdog(interval=0.01, threshold=0.05)
+    watchdog.start()
+    await asyncio.sleep(0.05)
+    _block_the_loop(0.3)
+    await asyncio.sleep(0.05)
+
+    report = await watchdog.stop()
+
+    assert report.stall_count == 1
+    assert "_block_the_loop" in report.stalls[0].stack
+    assert report.stalls[0].blocked_seconds > 0.05
+    assert report.max >= 0.25
+    assert report.p50 <= report.p95 <= report.p99 <= report.max
+
+
+@pytest.mark.asyncio
+async def test_watchdog_reports_no_stalls_on_idle_loop():
+    watchdog = LoopLagWatchdog(interval=0.01, threshold=0.2)
+    watchdog.start()
+    await asyncio.sleep(0.1)
+
+    report = await watchdog.stop()
+
+    assert report.samples > 0
+    assert report.stall_count == 0
+    assert not report.stalls
+
+
+@pytest.mark.asyncio
+async def test_watchdog_report_without_samples():
+    watchdog = LoopLagWatchdog(interval=0.01, threshold=0.05)
+
+    report = watchdog.report()
+
+    assert report.samples == 0
+    assert report.max == 0.0
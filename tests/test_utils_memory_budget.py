@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.utils.memory_budget import MemoryBudget, peak_rss_bytes
+
+
+@pytest.mark.asyncio
+async def test_reserve_waits_until_released():
+    budget = MemoryBudget(100)
+    first = await budget.reserve(80)
+
+    waiting = asyncio.create_task(budget.reserve(40))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    await budget.release(first)
+    assert await asyncio.wait_for(waiting, 1) == 40
+    assert budget.reserved == 40
+    assert budget.peak_reserved == 80
+
+
+@pytest.mark.asyncio
+async def test_reserve_caps_at_limit():
+    budget = MemoryBudget(100)
+
+    reserved = await budget.reserve(500)
+
+    assert reserved == 100
+    await budget.release(reserved)
+    assert budget.reserved == 0
+
+
+@pytest.mark.asyncio
+async def test_resize_does_not_wait_and_tracks_peak():
+    budget = MemoryBudget(100)
+    reserved = await budget.reserve(60)
+
+    reserved = await budget.resize(reserved, 150)
+
+    assert reserved == 150
+    assert budget.peak_reserved == 150
+    waiting = asyncio.create_task(budget.reserve(10))
+    await budget.resize(reserved, 20)
+    assert await asyncio.wait_for(waiting, 1) == 10
+    assert budget.reserved == 30
+
+
+def test_peak_rss_bytes():
+    assert peak_rss_bytes() > 1024 * 1024